@@ -131,6 +131,9 @@
 # backend/settings.py
 import os
 from pathlib import Path
+
+import django
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -150,11 +153,14 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',  # Full-text and trigram search
     'core',  # Main application
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'core.routers.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -193,6 +199,15 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 # }
 
 # For PostgreSQL (uncomment when needed):
+# Connection reuse, from the environment:
+#   DB_CONN_MAX_AGE       seconds a connection is kept across requests (0: one per request)
+#   DB_CONN_HEALTH_CHECKS check a reused connection before its first query
+#   DB_POOL               psycopg 3 connection pool instead (Django 5.1+, pip install "psycopg[pool]")
+#   DB_PGBOUNCER          behind pgbouncer in transaction mode: no server-side cursors
+DB_POOL = os.getenv('DB_POOL', 'False') == 'True'
+if DB_POOL and django.VERSION < (5, 1):
+    raise ImproperlyConfigured('DB_POOL requires Django 5.1 or later with psycopg 3')
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -201,9 +216,35 @@ DATABASES = {
         'PASSWORD': os.getenv('DB_PASSWORD'),
         'HOST': os.getenv('DB_HOST', 'localhost'),
         'PORT': os.getenv('DB_PORT', '5432'),
+        # Pooled connections are returned to the pool instead of persisting
+        'CONN_MAX_AGE': 0 if DB_POOL else int(os.getenv('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', 'True') == 'True',
+        'DISABLE_SERVER_SIDE_CURSORS': os.getenv('DB_PGBOUNCER', 'False') == 'True',
+        'OPTIONS': {
+            'pool': {
+                'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+                'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+                'timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),  # seconds to wait for a free connection
+            },
+        } if DB_POOL else {},
     }
 }
 
+# Read replicas: DB_REPLICA_HOSTS=host[:port],... adds replica_1, replica_2, ...
+# with the primary's database name and credentials. GET requests read from one
+# of them, except for REPLICA_PIN_SECONDS after the same browser wrote
+for _n, _address in enumerate(filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(',')), start=1):
+    _host, _, _port = _address.strip().partition(':')
+    DATABASES[f'replica_{_n}'] = {
+        **DATABASES['default'],
+        'HOST': _host,
+        'PORT': _port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+# Should exceed the replicas' usual replication lag
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 10))
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -223,10 +264,38 @@ STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 
+# collectstatic re-encodes PNGs, fingerprints file names and writes .gz/.br
+# copies; WhiteNoise serves the hashed names with an immutable one-year
+# Cache-Control header
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'core.storage.OptimizedStaticFilesStorage'},
+}
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Widths (px) of the WebP/JPEG derivatives generated for Project.image
+PROJECT_IMAGE_WIDTHS = [320, 640, 1024]
+
+# Project file delivery: 'python' streams through Django; 'nginx' (X-Accel-Redirect)
+# or 'apache' (X-Sendfile) let the front-end server send the file, e.g. for nginx:
+#   location /protected-media/ { internal; alias /path/to/media/; }
+DOWNLOAD_DELIVERY_BACKEND = os.getenv('DOWNLOAD_DELIVERY_BACKEND', 'python')
+DOWNLOAD_ACCEL_REDIRECT_PREFIX = os.getenv('DOWNLOAD_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+# Lifetime of signed download links, in seconds
+DOWNLOAD_TOKEN_MAX_AGE = int(os.getenv('DOWNLOAD_TOKEN_MAX_AGE', 900))
+# Download audit log: events are spilled to DOWNLOAD_LOG_DIR and written in
+# batches of DOWNLOAD_LOG_BATCH_SIZE, or every DOWNLOAD_LOG_FLUSH_INTERVAL seconds
+DOWNLOAD_LOG_DIR = os.getenv('DOWNLOAD_LOG_DIR', BASE_DIR / 'var' / 'download_log')
+DOWNLOAD_LOG_BATCH_SIZE = int(os.getenv('DOWNLOAD_LOG_BATCH_SIZE', 500))
+DOWNLOAD_LOG_FLUSH_INTERVAL = int(os.getenv('DOWNLOAD_LOG_FLUSH_INTERVAL', 5))
+# Download and PaymentTransaction partitions older than EVENT_RETENTION_MONTHS
+# are moved to gzipped files in EVENT_ARCHIVE_DIR by `manage.py archive_events`
+EVENT_RETENTION_MONTHS = int(os.getenv('EVENT_RETENTION_MONTHS', 12))
+EVENT_ARCHIVE_DIR = os.getenv('EVENT_ARCHIVE_DIR', BASE_DIR / 'var' / 'archive')
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -239,9 +308,30 @@ EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', EMAIL_HOST_USER)
 
+# Email outbox (drained by `manage.py send_queued_emails`)
+EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv('EMAIL_OUTBOX_BATCH_SIZE', 50))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', 6))
+EMAIL_OUTBOX_RETRY_BASE = int(os.getenv('EMAIL_OUTBOX_RETRY_BASE', 60))  # seconds
+
 # Razorpay Configuration
 RAZORPAY_KEY_ID = os.getenv('RAZORPAY_KEY_ID')
 RAZORPAY_KEY_SECRET = os.getenv('RAZORPAY_KEY_SECRET')
+RAZORPAY_WEBHOOK_SECRET = os.getenv('RAZORPAY_WEBHOOK_SECRET')
+# Events applied per batch by `manage.py process_payment_webhooks`
+WEBHOOK_BATCH_SIZE = int(os.getenv('WEBHOOK_BATCH_SIZE', 100))
+# Point at `manage.py fake_payment_gateway` (e.g. http://127.0.0.1:8765) for offline load tests
+RAZORPAY_BASE_URL = os.getenv('RAZORPAY_BASE_URL')
+
+# Payment gateway client
+PAYMENT_GATEWAY_POOL_SIZE = int(os.getenv('PAYMENT_GATEWAY_POOL_SIZE', 10))
+PAYMENT_GATEWAY_CONNECT_TIMEOUT = float(os.getenv('PAYMENT_GATEWAY_CONNECT_TIMEOUT', 3.05))
+PAYMENT_GATEWAY_READ_TIMEOUT = float(os.getenv('PAYMENT_GATEWAY_READ_TIMEOUT', 10))
+PAYMENT_GATEWAY_RETRIES = int(os.getenv('PAYMENT_GATEWAY_RETRIES', 2))
+PAYMENT_GATEWAY_RETRY_BACKOFF = float(os.getenv('PAYMENT_GATEWAY_RETRY_BACKOFF', 0.2))  # seconds
+# Total seconds a gateway call may take including retries; keep it below the worker timeout
+PAYMENT_GATEWAY_DEADLINE = float(os.getenv('PAYMENT_GATEWAY_DEADLINE', 20))
+PAYMENT_GATEWAY_BREAKER_THRESHOLD = int(os.getenv('PAYMENT_GATEWAY_BREAKER_THRESHOLD', 5))
+PAYMENT_GATEWAY_BREAKER_RESET = float(os.getenv('PAYMENT_GATEWAY_BREAKER_RESET', 30))  # seconds
 
 # Login URLs
 LOGIN_URL = 'core:login'
@@ -260,5 +350,38 @@ if not DEBUG:
     SECURE_HSTS_INCLUDE_SUBDOMAINS = True
     SECURE_HSTS_PRELOAD = True
 
+# Cache: local memory by default, or a shared file-based cache so every
+# gunicorn worker sees catalogue invalidations, e.g.
+# CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache
+# CACHE_LOCATION=/var/tmp/projectlibrary_cache
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'projectlibrary'),
+    }
+}
+# Rendered catalogue pages and query results, invalidated on Project changes
+CATALOGUE_CACHE_TIMEOUT = int(os.getenv('CATALOGUE_CACHE_TIMEOUT', 600))
+# Rendered project cards, keyed by project revision
+PROJECT_CARD_CACHE_TIMEOUT = int(os.getenv('PROJECT_CARD_CACHE_TIMEOUT', 86400))
+# Co-purchase neighbours stored per project by refresh_recommendations
+RECOMMENDATIONS_PER_PROJECT = int(os.getenv('RECOMMENDATIONS_PER_PROJECT', 10))
+# Per-user owned-project sets used for purchase checks
+USER_LIBRARY_CACHE_TIMEOUT = int(os.getenv('USER_LIBRARY_CACHE_TIMEOUT', 3600))
+# Per-user dashboard totals, invalidated on order changes and downloads
+DASHBOARD_STATS_CACHE_TIMEOUT = int(os.getenv('DASHBOARD_STATS_CACHE_TIMEOUT', 3600))
+
+# Seconds between flushes of buffered counters (Project.downloads)
+COUNTER_FLUSH_INTERVAL = int(os.getenv('COUNTER_FLUSH_INTERVAL', 5))
+
+# Days before today that rollup_analytics always recounts from source, so rows
+# committed out of id order (after the watermark passed them) are still counted
+ANALYTICS_LOOKBACK_DAYS = int(os.getenv('ANALYTICS_LOOKBACK_DAYS', 2))
+
 # Pagination
-PAGINATE_BY = 12
\ No newline at end of file
+PAGINATE_BY = 12
+# Show an approximate project total (planner statistics) instead of COUNT(*)
+PROJECT_LIST_ESTIMATED_COUNT = os.getenv('PROJECT_LIST_ESTIMATED_COUNT', 'False') == 'True'
+
+# Rows fetched per server-side cursor round trip by CSV/JSONL exports
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', 2000))
@@ -1,7 +1,66 @@
 # core/admin.py
+from datetime import timedelta
 from django.contrib import admin
+from django.http import StreamingHttpResponse
+from django.template.response import TemplateResponse
+from django.utils import timezone
 from django.utils.html import format_html
-from .models import Project, Order, CustomProjectRequest, PaymentTransaction, Download, UserProfile
+from .analytics import summarize
+from .exports import FORMATS, export_filename, iter_export
+from .pagination import EstimatedCountPaginator
+from .models import Project, Order, CustomProjectRequest, PaymentTransaction, Download, UserProfile, OutboundEmail, PaymentWebhookEvent, DailyProjectStats
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelist for tables too big to count or scan on every page view.
+
+    Counts come from planner estimates, facet counts are off, and each
+    search_fields entry is a full lookup (e.g. 'order_id__exact') run as its
+    own indexed query and unioned by primary key, instead of one OR across
+    joined tables that Postgres can only answer with a sequential scan.
+
+    The export actions stream the selection (or, with "select all", the
+    whole filtered changelist) as CSV or JSON Lines.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+    actions = ['export_csv', 'export_csv_gzip', 'export_jsonl', 'export_jsonl_gzip']
+    
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        manager = self.model._default_manager
+        matches = [
+            manager.filter(**{lookup: search_term}).order_by().values('pk')
+            for lookup in self.get_search_fields(request)
+        ]
+        return queryset.filter(pk__in=matches[0].union(*matches[1:])), False
+    
+    def _export(self, queryset, fmt, compress=False):
+        response = StreamingHttpResponse(
+            iter_export(queryset, fmt=fmt, compress=compress),
+            content_type='application/gzip' if compress else FORMATS[fmt],
+        )
+        filename = export_filename(self.model, fmt, compress)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+    
+    def export_csv(self, request, queryset):
+        return self._export(queryset, 'csv')
+    export_csv.short_description = 'Export selected as CSV'
+    
+    def export_csv_gzip(self, request, queryset):
+        return self._export(queryset, 'csv', compress=True)
+    export_csv_gzip.short_description = 'Export selected as CSV (gzip)'
+    
+    def export_jsonl(self, request, queryset):
+        return self._export(queryset, 'jsonl')
+    export_jsonl.short_description = 'Export selected as JSON Lines'
+    
+    def export_jsonl_gzip(self, request, queryset):
+        return self._export(queryset, 'jsonl', compress=True)
+    export_jsonl_gzip.short_description = 'Export selected as JSON Lines (gzip)'
 
 @admin.register(Project)
 class ProjectAdmin(admin.ModelAdmin):
@@ -36,11 +95,15 @@ class ProjectAdmin(admin.ModelAdmin):
             obj.save()
 
 @admin.register(Order)
-class OrderAdmin(admin.ModelAdmin):
+class OrderAdmin(LargeTableAdmin):
     """Order admin interface"""
     list_display = ['order_id', 'user', 'project', 'amount', 'status', 'created_at', 'payment_id_display']
     list_filter = ['status', 'created_at']
-    search_fields = ['order_id', 'user__username', 'project__title', 'razorpay_payment_id']
+    list_select_related = ['user', 'project']
+    date_hierarchy = 'created_at'
+    # Exact ids, username prefix and trigram-indexed title
+    search_fields = ['order_id__exact', 'razorpay_order_id__exact', 'razorpay_payment_id__exact',
+                     'user__username__startswith', 'project__title__icontains']
     readonly_fields = ['order_id', 'razorpay_order_id', 'razorpay_payment_id', 'razorpay_signature', 'created_at', 'updated_at']
     list_per_page = 50
     
@@ -101,22 +164,27 @@ class CustomProjectRequestAdmin(admin.ModelAdmin):
     mark_completed.short_description = 'Mark selected as Completed'
 
 @admin.register(PaymentTransaction)
-class PaymentTransactionAdmin(admin.ModelAdmin):
+class PaymentTransactionAdmin(LargeTableAdmin):
     """Payment transaction admin interface"""
     list_display = ['transaction_id', 'order', 'amount', 'status', 'created_at']
     list_filter = ['status', 'created_at']
-    search_fields = ['transaction_id', 'order__order_id']
+    # Order.__str__ shows the buyer's username
+    list_select_related = ['order__user']
+    date_hierarchy = 'created_at'
+    search_fields = ['transaction_id__exact', 'order__order_id__exact']
     readonly_fields = ['transaction_id', 'order', 'amount', 'currency', 'payment_method', 'status', 'razorpay_response', 'created_at']
     
     def has_add_permission(self, request):
         return False
 
 @admin.register(Download)
-class DownloadAdmin(admin.ModelAdmin):
+class DownloadAdmin(LargeTableAdmin):
     """Download tracking admin interface"""
     list_display = ['user', 'project', 'order', 'downloaded_at', 'ip_address']
     list_filter = ['downloaded_at']
-    search_fields = ['user__username', 'project__title', 'order__order_id']
+    list_select_related = ['user', 'project', 'order__user']
+    date_hierarchy = 'downloaded_at'
+    search_fields = ['user__username__startswith', 'project__title__icontains', 'order__order_id__exact']
     readonly_fields = ['user', 'project', 'order', 'downloaded_at', 'ip_address']
     
     def has_add_permission(self, request):
@@ -140,4 +208,77 @@ class UserProfileAdmin(admin.ModelAdmin):
             'fields': ('created_at',),
             'classes': ('collapse',)
         }),
-    )
\ No newline at end of file
+    )
+
+@admin.register(PaymentWebhookEvent)
+class PaymentWebhookEventAdmin(admin.ModelAdmin):
+    """Payment webhook event admin interface"""
+    list_display = ['event_id', 'event_type', 'payment_id', 'status', 'received_at', 'processed_at']
+    list_filter = ['status', 'event_type', 'received_at']
+    search_fields = ['event_id', 'payment_id', 'razorpay_order_id']
+    readonly_fields = ['event_id', 'event_type', 'payment_id', 'razorpay_order_id', 'payload', 'error', 'received_at', 'processed_at']
+    
+    actions = ['reprocess']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def reprocess(self, request, queryset):
+        updated = queryset.filter(status='failed').update(status='pending', error='')
+        self.message_user(request, f'{updated} events queued for reprocessing.')
+    reprocess.short_description = 'Reprocess selected failed events'
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    """Email outbox admin interface"""
+    list_display = ['subject', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['subject']
+    readonly_fields = ['subject', 'body', 'from_email', 'recipients', 'attempts', 'last_error', 'created_at', 'sent_at']
+    
+    actions = ['requeue']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def requeue(self, request, queryset):
+        updated = queryset.exclude(status='sent').update(status='pending', attempts=0, next_attempt_at=timezone.now())
+        self.message_user(request, f'{updated} emails queued for retry.')
+    requeue.short_description = 'Retry selected emails'
+
+@admin.register(DailyProjectStats)
+class AnalyticsAdmin(admin.ModelAdmin):
+    """Sales and download analytics, read from the daily rollups (see rollup_analytics)"""
+    change_list_template = 'admin/core/analytics.html'
+    PERIODS = [7, 30, 90, 365]
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+    
+    def changelist_view(self, request, extra_context=None):
+        try:
+            days = int(request.GET.get('days', 30))
+        except ValueError:
+            days = 30
+        if days not in self.PERIODS:
+            days = 30
+        end = timezone.localdate()
+        start = end - timedelta(days=days - 1)
+        context = {
+            **self.admin_site.each_context(request),
+            'title': 'Sales and download analytics',
+            'opts': self.model._meta,
+            'periods': self.PERIODS,
+            'days': days,
+            'start': start,
+            'end': end,
+            **summarize(start, end),
+            **(extra_context or {}),
+        }
+        return TemplateResponse(request, self.change_list_template, context)
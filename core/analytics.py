@@ -0,0 +1,150 @@
+# core/analytics.py
+from collections import Counter, defaultdict
+from datetime import datetime, time, timedelta
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Max, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import (
+    DailyProjectStats, DailyTechnologyStats, Download, Order, PaymentTransaction, Project, Watermark,
+)
+
+METRICS = ['orders_created', 'orders_completed', 'revenue', 'downloads']
+
+
+def _sources():
+    """(name, base queryset, rows to count, date field, project field, metric aggregates)
+
+    New rows of each source are found from a per-source primary key
+    watermark; they only tell which days changed, since ids are not
+    committed in order (concurrent audit log flushers, payments written in
+    long webhook batches). Downloads are dated by downloaded_at, which the
+    audit log writes in delayed batches, so new ids can land on old days.
+    """
+    return [
+        ('orders', Order.objects.all(), Order.objects.all(), 'created_at', 'project_id',
+         {'orders_created': Count('id')}),
+        # A payment for an already owned project is refunded, not a sale
+        ('payments', PaymentTransaction.objects.all(),
+         PaymentTransaction.objects.filter(status='success').exclude(order__status='duplicate'),
+         'created_at', 'order__project_id', {'orders_completed': Count('id'), 'revenue': Sum('amount')}),
+        ('downloads', Download.objects.all(), Download.objects.all(), 'downloaded_at', 'project_id',
+         {'downloads': Count('id')}),
+    ]
+
+
+def _on_days(date_field, days):
+    """Q for date_field falling on any of days (local dates), one index-friendly range per run of consecutive days"""
+    def midnight(day):
+        return timezone.make_aware(datetime.combine(day, time.min))
+
+    runs = []
+    for day in sorted(days):
+        if runs and runs[-1][1] == day:
+            runs[-1][1] = day + timedelta(days=1)
+        else:
+            runs.append([day, day + timedelta(days=1)])
+    return reduce(or_, (
+        Q(**{f'{date_field}__gte': midnight(start), f'{date_field}__lt': midnight(end)})
+        for start, end in runs
+    ))
+
+
+def _replace(model, key_field, days, totals, chunk_size=1000):
+    """Make model's rows for days exactly totals {(date, key): Counter}"""
+    model.objects.filter(date__in=days).delete()
+    model.objects.bulk_create(
+        [model(date=date, **{key_field: key}, **values) for (date, key), values in totals.items()],
+        batch_size=chunk_size,
+    )
+
+
+def rollup_analytics():
+    """Recompute the daily rollups of every day that changed since the last run; returns new rows.
+
+    A day changed if rows past a source's watermark fall on it, or if it is
+    within the last ANALYTICS_LOOKBACK_DAYS: a row committed after a
+    higher id was already consumed is below the watermark, and is only
+    picked up by that recount. Changed days are recomputed from source and
+    replace the stored totals, so recounting is idempotent. Runs in one
+    transaction holding the watermark rows, so concurrent runs serialize
+    and a failed run leaves both rollups and watermarks untouched.
+    """
+    consumed = 0
+    today = timezone.localdate()
+    days = {today - timedelta(days=n) for n in range(settings.ANALYTICS_LOOKBACK_DAYS + 1)}
+    with transaction.atomic():
+        sources = _sources()
+        for name, base, queryset, date_field, project_field, aggregates in sources:
+            watermark, _ = Watermark.objects.select_for_update().get_or_create(
+                name=f'analytics:{name}', defaults={'position': 0},
+            )
+            new_rows = base.filter(pk__gt=watermark.position).aggregate(upper=Max('pk'), count=Count('pk'))
+            if not new_rows['count']:
+                continue
+            upper = new_rows['upper']
+            consumed += new_rows['count']
+            days.update(
+                base.filter(pk__gt=watermark.position, pk__lte=upper).order_by()
+                .values_list(TruncDate(date_field), flat=True).distinct()
+            )
+            watermark.position = upper
+            watermark.save(update_fields=['position', 'updated_at'])
+
+        days = sorted(days)
+        project_totals = defaultdict(Counter)
+        for name, base, queryset, date_field, project_field, aggregates in sources:
+            for row in (
+                queryset.filter(_on_days(date_field, days)).order_by()
+                .values(day=TruncDate(date_field), project_key=F(project_field)).annotate(**aggregates)
+            ):
+                for metric in aggregates:
+                    project_totals[(row['day'], row['project_key'])][metric] += row[metric] or 0
+
+        technologies = dict(
+            Project.objects.filter(id__in={project for _, project in project_totals})
+            .values_list('id', 'technology')
+        )
+        technology_totals = defaultdict(Counter)
+        for (date, project), totals in project_totals.items():
+            technology_totals[(date, technologies[project])].update(totals)
+
+        _replace(DailyProjectStats, 'project_id', days, project_totals)
+        _replace(DailyTechnologyStats, 'technology', days, technology_totals)
+    return consumed
+
+
+def _with_conversion(row):
+    created = row['orders_created'] or 0
+    row['conversion'] = (row['orders_completed'] or 0) * 100 / created if created else None
+    return row
+
+
+def summarize(start, end, top=20):
+    """Totals for the admin analytics page, read from the rollups only.
+
+    Work is bounded by the number of days and projects in the window, not
+    by the size of the order and download history.
+    """
+    totals = {metric: Sum(metric) for metric in METRICS}
+    by_technology = DailyTechnologyStats.objects.filter(date__range=(start, end)).order_by()
+    by_project = DailyProjectStats.objects.filter(date__range=(start, end)).order_by()
+    return {
+        'overall': _with_conversion(by_technology.aggregate(**totals)),
+        'days': [
+            _with_conversion(row) for row in by_technology.values('date').annotate(**totals).order_by('-date')
+        ],
+        'technologies': [
+            _with_conversion(row)
+            for row in by_technology.values('technology').annotate(**totals).order_by('-revenue')
+        ],
+        'projects': [
+            _with_conversion(row) for row in by_project.values('project_id', 'project__title')
+            .annotate(**totals).order_by('-revenue', '-downloads')[:top]
+        ],
+    }
@@ -0,0 +1,232 @@
+# core/audit.py
+import atexit
+import fcntl
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .dashboard import invalidate_user_stats
+from .models import Download
+
+logger = logging.getLogger(__name__)
+
+# Events that can never be written (deleted user, project or order), kept for inspection
+QUARANTINE_NAME = 'quarantine.jsonl'
+
+
+class DownloadLog:
+    """Append-only download event pipeline.
+
+    Every event is appended to a per-process spill file as one JSON line
+    before the request returns, so nothing is lost if the worker dies. A
+    daemon thread periodically (or as soon as batch_size events are
+    waiting) rotates the spill file into a segment and bulk_creates the
+    segment's events as Download rows, deleting it once committed.
+
+    Each process names its files after its owner id, the host name plus a
+    random per-process id, and holds an exclusive lock on `<owner>.lock`
+    while it runs. The spill file is fsynced every batch_size events and
+    before it is rotated. Files of an owner whose lock can be taken (the
+    process is gone; locks die with it) are claimed by renaming them into
+    the claiming owner's name, so they are picked up exactly once, by the
+    next flush of any process or by `manage.py flush_download_log`, even
+    when several hosts share the directory or PIDs are reused. Events
+    whose user, project or order has been deleted meanwhile are moved to
+    QUARANTINE_NAME in the same directory.
+    """
+
+    def __init__(self, directory, batch_size, interval):
+        self.directory = Path(directory)
+        self.batch_size = batch_size
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._file = None
+        self._pid = None
+        self._owner = None
+        self._owner_lock = None
+        self._waiting = 0
+        self._thread = None
+        self._thread_pid = None
+
+    def record(self, user_id, project_id, order_id, ip_address=None):
+        line = json.dumps({
+            'user_id': user_id,
+            'project_id': project_id,
+            'order_id': order_id,
+            'ip_address': ip_address,
+            'downloaded_at': timezone.now().isoformat(),
+        })
+        with self._lock:
+            self._take_owner()
+            if self._thread_pid != os.getpid():
+                self._thread_pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='download-log', daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+            if self._file is None:
+                self._file = open(self._active_path(), 'a', encoding='utf-8')
+            self._file.write(line + '\n')
+            self._file.flush()
+            self._waiting += 1
+            if self._waiting % self.batch_size == 0:
+                os.fsync(self._file.fileno())
+            if self._waiting >= self.batch_size:
+                self._wake.set()
+
+    def _take_owner(self):
+        """On first use in this (possibly forked) process, pick an owner id and lock it"""
+        if self._pid == os.getpid():
+            return
+        if self._owner_lock is not None:
+            # Inherited from the parent; holding it would keep the parent's files from being claimed
+            self._owner_lock.close()
+        self._pid = os.getpid()
+        self._owner = f'{socket.gethostname().replace(".", "_")}-{uuid.uuid4().hex}'
+        self._file = None
+        self._waiting = 0
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Locked before it appears under its name, so nobody can take it first
+        pending = self.directory / f'{self._owner}.lock.new'
+        self._owner_lock = open(pending, 'w')
+        fcntl.flock(self._owner_lock, fcntl.LOCK_EX)
+        os.rename(pending, self._lock_path(self._owner))
+
+    def flush(self):
+        """Write every pending event of this process (and of dead processes) to the database"""
+        with self._flush_lock:
+            with self._lock:
+                self._take_owner()
+                if self._file is not None:
+                    os.fsync(self._file.fileno())
+                    self._file.close()
+                    self._file = None
+                    self._claim(self._active_path())
+                self._waiting = 0
+
+            self._claim_orphans()
+            for path in sorted(self.directory.glob(f'{self._owner}.*.segment.jsonl')):
+                self._write_segment(path)
+
+    def _active_path(self):
+        return self.directory / f'{self._owner}.active.jsonl'
+
+    def _lock_path(self, owner):
+        return self.directory / f'{owner}.lock'
+
+    def _claim(self, path):
+        """Atomically rename path into a segment owned by this process"""
+        target = self.directory / f'{self._owner}.{time.time_ns()}.segment.jsonl'
+        try:
+            os.rename(path, target)
+        except FileNotFoundError:
+            return None  # Another process claimed it first
+        return target
+
+    def _claim_orphans(self):
+        """Take over spill files and segments of owners that no longer hold their lock"""
+        for lock_path in self.directory.glob('*.lock'):
+            owner = lock_path.name[:-len('.lock')]
+            if owner == self._owner:
+                continue
+            try:
+                lock = open(lock_path)
+            except FileNotFoundError:
+                continue  # Claimed by another process meanwhile
+            with lock:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue  # Owner still running
+                for path in self.directory.glob(f'{owner}.*.jsonl'):
+                    self._claim(path)
+                # Removed while still locked, so a concurrent claimer finds nothing left to take
+                lock_path.unlink(missing_ok=True)
+
+        # Files without a lock: left by a claim interrupted before the
+        # renames finished, or named by PID before owner ids were used
+        for path in self.directory.glob('*.jsonl'):
+            owner = path.name.split('.', 1)[0]
+            if path.name != QUARANTINE_NAME and owner != self._owner and not self._lock_path(owner).exists():
+                self._claim(path)
+
+    def _split_dangling(self, events):
+        """Split (line, row) events into rows whose foreign keys all exist and the lines of the rest"""
+        existing = {}
+        for field in ('user', 'project', 'order'):
+            model = Download._meta.get_field(field).related_model
+            ids = {getattr(row, f'{field}_id') for _, row in events}
+            existing[field] = set(model._base_manager.filter(pk__in=ids).values_list('pk', flat=True))
+        rows, dangling = [], []
+        for line, row in events:
+            if all(getattr(row, f'{field}_id') in ids for field, ids in existing.items()):
+                rows.append(row)
+            else:
+                dangling.append(line)
+        return rows, dangling
+
+    def _write_segment(self, path):
+        events = []
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue  # Torn final line from a crash mid-write
+                events.append((line, Download(
+                    user_id=event['user_id'],
+                    project_id=event['project_id'],
+                    order_id=event['order_id'],
+                    ip_address=event['ip_address'],
+                    downloaded_at=parse_datetime(event['downloaded_at']),
+                )))
+        rows, dangling = [row for _, row in events], []
+        try:
+            try:
+                Download.objects.bulk_create(rows, batch_size=self.batch_size)
+            except IntegrityError:
+                # A user, project or order deleted since the download; retrying
+                # would fail forever, so write the rest and set those events aside
+                rows, dangling = self._split_dangling(events)
+                Download.objects.bulk_create(rows, batch_size=self.batch_size)
+        except Exception:
+            # Segment stays on disk and is retried on the next flush
+            logger.exception('Download log flush failed for %s', path.name)
+            return
+        if dangling:
+            with open(self.directory / QUARANTINE_NAME, 'a', encoding='utf-8') as f:
+                f.writelines(dangling)
+            logger.warning('Quarantined %d download events of %s with deleted references', len(dangling), path.name)
+        path.unlink()
+        invalidate_user_stats(*{row.user_id for row in rows})
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Download log flush failed')
+
+
+download_log = DownloadLog(
+    settings.DOWNLOAD_LOG_DIR, settings.DOWNLOAD_LOG_BATCH_SIZE, settings.DOWNLOAD_LOG_FLUSH_INTERVAL,
+)
+
+
+def log_download(user_id, project_id, order_id, ip_address=None):
+    """Queue a Download audit record"""
+    download_log.record(user_id, project_id, order_id, ip_address)
@@ -0,0 +1,94 @@
+# core/cache.py
+import hashlib
+import time
+from contextlib import nullcontext
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+from .routers import primary_reads
+
+CATALOGUE_VERSION_KEY = 'catalogue:version'
+
+
+def get_catalogue_version():
+    """Current catalogue version stamp, created on first use"""
+    version = cache.get(CATALOGUE_VERSION_KEY)
+    if version is None:
+        # A fresh timestamp (never a reused counter) so an evicted stamp
+        # can't resurrect pages cached under an older version; backdated
+        # since no write is behind it that replicas could lag (_fill_reads)
+        cache.add(CATALOGUE_VERSION_KEY, time.time_ns() - settings.REPLICA_PIN_SECONDS * 10**9, None)
+        version = cache.get(CATALOGUE_VERSION_KEY)
+    return version
+
+
+def bump_catalogue_version():
+    """Invalidate every cached catalogue page and query result"""
+    cache.set(CATALOGUE_VERSION_KEY, time.time_ns(), None)
+
+
+def catalogue_key(variant, *parts):
+    """Cache key scoped to the current catalogue version"""
+    digest = hashlib.md5('|'.join(str(part) for part in parts).encode()).hexdigest()
+    return f'catalogue:{get_catalogue_version()}:{variant}:{digest}'
+
+
+def _fill_reads():
+    """Read from the primary while replicas may still lag the change that bumped the version.
+
+    The version stamp is the bump's time, so this costs no extra lookup;
+    without it a lagging replica could refill the cache with the old
+    catalogue for CATALOGUE_CACHE_TIMEOUT.
+    """
+    if time.time_ns() - get_catalogue_version() < settings.REPLICA_PIN_SECONDS * 10**9:
+        return primary_reads()
+    return nullcontext()
+
+
+def cached_catalogue_query(name, *parts, builder):
+    """Return builder() cached until the catalogue changes"""
+    key = catalogue_key('query', name, *parts)
+    result = cache.get(key)
+    if result is None:
+        with _fill_reads():
+            result = builder()
+        cache.set(key, result, settings.CATALOGUE_CACHE_TIMEOUT)
+    return result
+
+
+def _has_pending_messages(request):
+    """True if a flash message is waiting to be shown (cookie or session storage)"""
+    return 'messages' in request.COOKIES or bool(request.session.get('_messages'))
+
+
+def cache_anonymous_page(view_func):
+    """Serve rendered pages to anonymous visitors from the catalogue cache.
+
+    Authenticated users always get a fresh render, since their pages carry
+    purchase state and personal details.
+    """
+    @wraps(view_func)
+    def _wrapped_view(request, *args, **kwargs):
+        if (request.method != 'GET' or request.user.is_authenticated
+                or _has_pending_messages(request)):
+            return view_func(request, *args, **kwargs)
+
+        key = catalogue_key('page-anon', request.get_full_path())
+        cached = cache.get(key)
+        if cached is not None:
+            content, content_type = cached
+            response = HttpResponse(content, content_type=content_type)
+        else:
+            with _fill_reads():
+                response = view_func(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming and not response.cookies:
+                cache.set(key, (response.content, response['Content-Type']),
+                          settings.CATALOGUE_CACHE_TIMEOUT)
+        patch_vary_headers(response, ('Cookie',))
+        return response
+
+    return _wrapped_view
@@ -0,0 +1,83 @@
+# core/counters.py
+import atexit
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F
+
+from .models import Project
+
+logger = logging.getLogger(__name__)
+
+
+class CounterBuffer:
+    """Write-behind buffer for integer counter columns.
+
+    Increments are summed in memory and flushed periodically by a daemon
+    thread as one UPDATE ... SET col = col + n per distinct n, so concurrent
+    increments never race and the row's other columns (including
+    updated_at) are left alone. Readers see the database value, which lags
+    by at most one flush interval.
+    """
+
+    def __init__(self, model, field, interval):
+        self.model = model
+        self.field = field
+        self.interval = interval
+        self._pending = Counter()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def increment(self, pk, amount=1):
+        with self._lock:
+            self._pending[pk] += amount
+            if self._thread is None:
+                self._start()
+
+    def flush(self):
+        """Write all buffered increments to the database"""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+        if not pending:
+            return
+
+        by_amount = defaultdict(list)
+        for pk, amount in pending.items():
+            by_amount[amount].append(pk)
+        try:
+            for amount, pks in by_amount.items():
+                self.model.objects.filter(pk__in=pks).update(
+                    **{self.field: F(self.field) + amount}
+                )
+        except Exception:
+            logger.exception('Counter flush failed, re-queueing %s increments', self.field)
+            with self._lock:
+                self._pending.update(pending)
+
+    def _start(self):
+        self._thread = threading.Thread(target=self._run, name=f'{self.field}-counter', daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            close_old_connections()
+            self.flush()
+
+
+download_counter = CounterBuffer(Project, 'downloads', settings.COUNTER_FLUSH_INTERVAL)
+
+
+def increment_downloads(project_id, amount=1):
+    """Buffer a Project.downloads increment"""
+    download_counter.increment(project_id, amount)
+
+
+def flush_counters():
+    """Flush buffered counters now (tests, shutdown hooks)"""
+    download_counter.flush()
@@ -0,0 +1,53 @@
+# core/dashboard.py
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Count, DecimalField, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import Download, Order
+from .routers import primary_reads
+
+
+def _stats_key(user_id):
+    return f'dashboard_stats:{user_id}'
+
+
+def _per_user(queryset, aggregate, output_field):
+    """Scalar subquery aggregating queryset's rows for the outer user"""
+    return Subquery(
+        queryset.filter(user=OuterRef('pk')).order_by().values('user')
+        .annotate(value=aggregate).values('value'),
+        output_field=output_field,
+    )
+
+
+def get_user_stats(user_id):
+    """Purchase count, total spent and download count for the dashboard.
+
+    Computed in one query and cached until invalidate_user_stats is called
+    for the user (on any order change or flushed download).
+    """
+    key = _stats_key(user_id)
+    stats = cache.get(key)
+    if stats is None:
+        completed = Order.objects.filter(status='completed')
+        # From the primary, like the user library, so a lagging replica
+        # can't cache totals from before the invalidating write
+        with primary_reads():
+            stats = User.objects.filter(pk=user_id).values(
+                purchases=Coalesce(_per_user(completed, Count('id'), IntegerField()), 0),
+                total_spent=Coalesce(
+                    _per_user(completed, Sum('amount'), DecimalField()), Value(Decimal('0')),
+                    output_field=DecimalField(),
+                ),
+                downloads=Coalesce(_per_user(Download.objects.all(), Count('id'), IntegerField()), 0),
+            ).first() or {'purchases': 0, 'total_spent': Decimal('0'), 'downloads': 0}
+        cache.set(key, stats, settings.DASHBOARD_STATS_CACHE_TIMEOUT)
+    return stats
+
+
+def invalidate_user_stats(*user_ids):
+    cache.delete_many([_stats_key(user_id) for user_id in user_ids])
@@ -0,0 +1,31 @@
+# core/delivery.py
+import os
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import FileResponse, HttpResponse
+from django.utils.http import content_disposition_header
+
+
+def serve_file(name, storage=default_storage):
+    """Send the stored file `name` as an attachment using the configured delivery backend.
+
+    'nginx' and 'apache' hand the transfer to the front-end server
+    (X-Accel-Redirect / X-Sendfile) so the worker is freed immediately;
+    'python' streams the file through Django.
+    """
+    backend = settings.DOWNLOAD_DELIVERY_BACKEND
+    filename = os.path.basename(name)
+
+    if backend == 'nginx':
+        response = HttpResponse(content_type='application/octet-stream')
+        response['X-Accel-Redirect'] = settings.DOWNLOAD_ACCEL_REDIRECT_PREFIX + quote(name)
+    elif backend == 'apache':
+        response = HttpResponse(content_type='application/octet-stream')
+        response['X-Sendfile'] = storage.path(name)
+    else:
+        return FileResponse(storage.open(name, 'rb'), as_attachment=True, filename=filename)
+
+    response['Content-Disposition'] = content_disposition_header(True, filename)
+    return response
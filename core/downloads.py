@@ -0,0 +1,38 @@
+# core/downloads.py
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.urls import reverse
+
+DOWNLOAD_TOKEN_SALT = 'core.downloads.token'
+
+
+def make_download_token(order_pk, user_id, project):
+    """Signed, expiring token carrying everything needed to serve project's file"""
+    return signing.Signer(salt=DOWNLOAD_TOKEN_SALT).sign_object({
+        'o': order_pk,
+        'u': user_id,
+        'p': project.pk,
+        'f': project.project_file.name,
+        'e': int(time.time()) + settings.DOWNLOAD_TOKEN_MAX_AGE,
+    }, compress=True)
+
+
+def read_download_token(token):
+    """Return the token's claims, or None if it is forged or expired"""
+    try:
+        claims = signing.Signer(salt=DOWNLOAD_TOKEN_SALT).unsign_object(token)
+    except signing.BadSignature:
+        return None
+    if not isinstance(claims, dict) or claims.get('e', 0) < time.time():
+        return None
+    return claims
+
+
+def signed_project_download_url(order_pk, user_id, project):
+    return reverse('core:signed_download', args=[make_download_token(order_pk, user_id, project)])
+
+
+def signed_download_url(order):
+    return signed_project_download_url(order.pk, order.user_id, order.project)
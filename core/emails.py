@@ -0,0 +1,137 @@
+# core/emails.py
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+
+def queue_email(subject, message, recipients, from_email=None):
+    """Write an email to the outbox; commits or rolls back with the caller's transaction"""
+    return OutboundEmail.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL or '',
+        recipients=list(recipients),
+    )
+
+
+def queue_purchase_confirmation_email(order):
+    """Queue purchase confirmation email"""
+    subject = f'Purchase Confirmation - {order.project.title}'
+    message = f"""
+    Dear {order.user.get_full_name() or order.user.username},
+    
+     Thank you for your purchase from ProjectLibrary!
+    
+    Order Details:
+    - Order ID: {order.order_id}
+    - Project: {order.project.title}
+    - Amount: ₹{order.amount}
+    
+    You can download your project from your dashboard.
+    
+     Thank you for choosing ProjectLibrary!
+    
+    Best regards,
+    ProjectLibrary Team 
+    """
+    
+    return queue_email(subject, message, [order.user.email])
+
+
+def queue_custom_request_notification(custom_request):
+    """Queue custom request notification to admin"""
+    subject = f'New Custom Project Request - {custom_request.project_type}'
+    message = f"""
+    New custom project request received:
+    
+    Name: {custom_request.name}
+    Email: {custom_request.email}
+    Phone: {custom_request.phone}
+    Project Type: {custom_request.project_type}
+    Deadline: {custom_request.deadline}
+    Budget: ₹{custom_request.budget}
+    
+    Description:
+    {custom_request.description}
+    
+    ProjectLibrary System
+    """
+    
+    return queue_email(subject, message, [settings.DEFAULT_FROM_EMAIL])
+
+
+def _retry_delay(attempts):
+    """Exponential backoff: base, 2x base, 4x base ... capped at one hour"""
+    return timedelta(seconds=min(settings.EMAIL_OUTBOX_RETRY_BASE * 2 ** (attempts - 1), 3600))
+
+
+def send_queued_emails(batch_size=None):
+    """Send one batch of due outbox emails over a single SMTP connection.
+
+    Rows are claimed with SELECT ... FOR UPDATE SKIP LOCKED so several
+    workers can drain the outbox in parallel. Failed sends are retried with
+    backoff; after EMAIL_OUTBOX_MAX_ATTEMPTS they are dead-lettered.
+    Returns (sent, failed).
+    """
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    sent = failed = 0
+
+    with transaction.atomic():
+        batch = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(status='pending', next_attempt_at__lte=timezone.now())
+            .order_by('next_attempt_at')[:batch_size]
+        )
+        if not batch:
+            return sent, failed
+
+        connection = get_connection()
+        try:
+            connection.open()
+        except Exception as e:
+            logger.warning('Could not connect to mail server: %s', e)
+            for email in batch:
+                _mark_failed(email, e)
+            return sent, len(batch)
+
+        try:
+            for email in batch:
+                message = EmailMessage(
+                    email.subject, email.body, email.from_email or None,
+                    email.recipients, connection=connection,
+                )
+                try:
+                    message.send()
+                except Exception as e:
+                    _mark_failed(email, e)
+                    failed += 1
+                else:
+                    email.status = 'sent'
+                    email.attempts += 1
+                    email.sent_at = timezone.now()
+                    email.last_error = ''
+                    email.save(update_fields=['status', 'attempts', 'sent_at', 'last_error'])
+                    sent += 1
+        finally:
+            connection.close()
+
+    return sent, failed
+
+
+def _mark_failed(email, error):
+    email.attempts += 1
+    email.last_error = str(error)
+    if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        email.status = 'dead'
+        logger.error('Email %s dead-lettered after %s attempts: %s', email.pk, email.attempts, error)
+    else:
+        email.next_attempt_at = timezone.now() + _retry_delay(email.attempts)
+    email.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at'])
@@ -0,0 +1,75 @@
+# core/entitlements.py
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Entitlement
+from .routers import primary_reads
+
+
+class UserLibrary:
+    """Sorted project ids a user owns, with the order that granted each.
+
+    Two parallel int arrays pickle to a few bytes per project, so even large
+    libraries are cheap to keep in the cache. Supports `project_id in
+    library` and `library.order_for(project_id)`.
+    """
+
+    def __init__(self, pairs=()):
+        pairs = sorted(pairs)
+        self.project_ids = array('q', [project_id for project_id, _ in pairs])
+        self.order_ids = array('q', [order_id for _, order_id in pairs])
+
+    def _index(self, project_id):
+        i = bisect_left(self.project_ids, project_id)
+        return i if i < len(self.project_ids) and self.project_ids[i] == project_id else None
+
+    def __contains__(self, project_id):
+        return self._index(project_id) is not None
+
+    def __len__(self):
+        return len(self.project_ids)
+
+    def order_for(self, project_id):
+        """pk of the order that granted project_id, or None if not owned"""
+        i = self._index(project_id)
+        return None if i is None else self.order_ids[i]
+
+
+def _library_key(user_id):
+    return f'library:{user_id}'
+
+
+def get_user_library(user_id):
+    """The user's owned projects, cached until an entitlement changes"""
+    key = _library_key(user_id)
+    library = cache.get(key)
+    if library is None:
+        # From the primary: a lagging replica would cache a library missing
+        # the purchase that just invalidated it
+        with primary_reads():
+            library = UserLibrary(
+                Entitlement.objects.filter(user_id=user_id).order_by().values_list('project_id', 'order_id')
+            )
+        cache.set(key, library, settings.USER_LIBRARY_CACHE_TIMEOUT)
+    return library
+
+
+def invalidate_user_library(user_id):
+    cache.delete(_library_key(user_id))
+
+
+def sync_entitlement(order):
+    """Grant or revoke the entitlement for order according to its status"""
+    if order.status == 'completed':
+        Entitlement.objects.get_or_create(
+            user_id=order.user_id, project_id=order.project_id, defaults={'order': order},
+        )
+    else:
+        # Refunded (or reopened) order: ownership ends with the order that granted it
+        Entitlement.objects.filter(order=order).delete()
+    # After commit, so a concurrent request can't re-cache the old library
+    transaction.on_commit(lambda: invalidate_user_library(order.user_id))
@@ -0,0 +1,96 @@
+# core/exports.py
+import csv
+import io
+import zlib
+from itertools import islice
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.utils import timezone
+
+from .models import Download, Order, PaymentTransaction
+
+# Exported columns per model, as values_list lookups (one JOINed query, no instances)
+EXPORT_FIELDS = {
+    Order: [
+        'order_id', 'user__username', 'user__email', 'project__title', 'amount', 'status',
+        'razorpay_order_id', 'razorpay_payment_id', 'created_at', 'updated_at',
+    ],
+    PaymentTransaction: [
+        'transaction_id', 'order__order_id', 'order__user__username', 'amount', 'currency',
+        'payment_method', 'status', 'created_at',
+    ],
+    Download: ['order__order_id', 'user__username', 'project__title', 'downloaded_at', 'ip_address'],
+}
+
+FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+
+def _batches(queryset, fields, chunk_size):
+    """Lists of up to chunk_size value tuples, read through a server-side cursor"""
+    if connections[queryset.db].settings_dict.get('DISABLE_SERVER_SIDE_CURSORS', False):
+        # Behind a transaction-mode pooler a cursor can't outlive its
+        # transaction, so page through the rows by primary key instead
+        queryset = queryset.order_by('pk')
+        last = None
+        while True:
+            page = queryset if last is None else queryset.filter(pk__gt=last)
+            batch = list(page.values_list('pk', *fields)[:chunk_size])
+            if not batch:
+                return
+            last = batch[-1][0]
+            yield [row[1:] for row in batch]
+    rows = queryset.values_list(*fields).iterator(chunk_size=chunk_size)
+    yield from iter(lambda: list(islice(rows, chunk_size)), [])
+
+
+def _encode_csv(fields, batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    yield buffer.getvalue()
+    for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(batch)
+        yield buffer.getvalue()
+
+
+def _encode_jsonl(fields, batches):
+    encoder = DjangoJSONEncoder()
+    for batch in batches:
+        yield ''.join(encoder.encode(dict(zip(fields, row))) + '\n' for row in batch)
+
+
+def _gzip(chunks):
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        # Sync flush per batch so the client receives bytes as rows are read
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def iter_export(queryset, fields=None, fmt='csv', compress=False, chunk_size=None):
+    """Yield queryset as CSV or JSON Lines bytes, optionally gzipped.
+
+    Rows are read through a server-side cursor in chunks of
+    EXPORT_CHUNK_SIZE and encoded one chunk at a time, so memory stays flat
+    however many rows match and the first bytes go out before the query
+    has finished. With server-side cursors disabled (DB_PGBOUNCER) rows
+    are paged by primary key and come out in pk order.
+    """
+    fields = fields or EXPORT_FIELDS[queryset.model]
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    batches = _batches(queryset, fields, chunk_size)
+    encode = _encode_csv if fmt == 'csv' else _encode_jsonl
+    chunks = (text.encode('utf-8') for text in encode(fields, batches))
+    return _gzip(chunks) if compress else chunks
+
+
+def export_filename(model, fmt, compress=False):
+    stamp = timezone.now().strftime('%Y%m%d-%H%M%S')
+    return f'{model._meta.model_name}s-{stamp}.{fmt}' + ('.gz' if compress else '')
@@ -0,0 +1,191 @@
+# core/gateway.py
+import asyncio
+import logging
+import random
+import threading
+import time
+
+import razorpay
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+logger = logging.getLogger(__name__)
+
+
+class PaymentGatewayError(Exception):
+    """The payment gateway call failed"""
+
+
+class GatewayUnavailable(PaymentGatewayError):
+    """The circuit breaker is open; the gateway was not called"""
+
+
+class CircuitBreaker:
+    """Stop calling a failing dependency for reset_timeout seconds.
+
+    Opens after failure_threshold consecutive failures, then lets a single
+    trial call through (half-open) once the timeout has elapsed.
+    """
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                # Half-open: allow one trial call, re-open if it fails
+                self._opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+def _not_sent(error):
+    """True if error shows the request never reached the gateway, so even a POST can be resent"""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    return isinstance(error, requests.ConnectionError) and isinstance(reason, NewConnectionError)
+
+
+class PaymentGateway:
+    """Razorpay client with a pooled keep-alive session, per-call timeouts,
+    bounded retries with jittered backoff within an overall deadline, and a
+    circuit breaker"""
+
+    # Transport failures and gateway 5xx (including non-JSON error pages from
+    # a proxy) are worth retrying; 4xx are not
+    RETRYABLE = (requests.ConnectionError, requests.Timeout, requests.JSONDecodeError,
+                 razorpay.errors.ServerError, razorpay.errors.GatewayError)
+
+    def __init__(self, key_id, key_secret, base_url=None, timeout=None, retries=None,
+                 pool_size=None, breaker=None, deadline=None):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size or settings.PAYMENT_GATEWAY_POOL_SIZE)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+
+        options = {'base_url': base_url} if base_url else {}
+        self.client = razorpay.Client(session=session, auth=(key_id, key_secret), **options)
+        self.timeout = timeout or (settings.PAYMENT_GATEWAY_CONNECT_TIMEOUT, settings.PAYMENT_GATEWAY_READ_TIMEOUT)
+        self.retries = settings.PAYMENT_GATEWAY_RETRIES if retries is None else retries
+        self.deadline = deadline or settings.PAYMENT_GATEWAY_DEADLINE
+        self.breaker = breaker or CircuitBreaker(
+            settings.PAYMENT_GATEWAY_BREAKER_THRESHOLD, settings.PAYMENT_GATEWAY_BREAKER_RESET,
+        )
+
+    def _call(self, func, *args, idempotent=True):
+        """Call func, retrying transient failures until self.deadline seconds have passed.
+
+        Calls that aren't idempotent (creating an order) are only retried
+        when the request provably never reached the gateway: after a read
+        timeout or a 5xx the order may exist, and resending would create a
+        second one.
+        """
+        if not self.breaker.allow():
+            raise GatewayUnavailable('Payment gateway temporarily unavailable')
+
+        connect_timeout, read_timeout = self.timeout
+        deadline = time.monotonic() + self.deadline
+        for attempt in range(self.retries + 1):
+            # Cap the read timeout so the attempt ends by the deadline
+            timeout = (connect_timeout, max(min(read_timeout, deadline - time.monotonic() - connect_timeout), 0.1))
+            try:
+                result = func(*args, timeout=timeout)
+            except self.RETRYABLE as e:
+                self.breaker.record_failure()
+                # Full jitter: sleep a random slice of an exponential window
+                delay = random.uniform(0, settings.PAYMENT_GATEWAY_RETRY_BACKOFF * 2 ** attempt)
+                if (
+                    attempt == self.retries
+                    or not (idempotent or _not_sent(e))
+                    # Not enough time left to connect and wait for a reply
+                    or time.monotonic() + delay + connect_timeout + 1 > deadline
+                    or not self.breaker.allow()
+                ):
+                    raise PaymentGatewayError(str(e) or e.__class__.__name__) from e
+                logger.warning('Gateway call failed (%s), retrying in %.2fs', e, delay)
+                time.sleep(delay)
+            except razorpay.errors.BadRequestError as e:
+                # The gateway is healthy, the request was wrong
+                self.breaker.record_success()
+                raise PaymentGatewayError(str(e)) from e
+            else:
+                self.breaker.record_success()
+                return result
+
+    def create_order(self, amount, currency='INR', receipt=None):
+        """Create a gateway order for amount (in paise)"""
+        data = {'amount': amount, 'currency': currency, 'payment_capture': 1}
+        if receipt:
+            data['receipt'] = receipt
+        return self._call(self.client.order.create, data, idempotent=False)
+
+    def fetch_payment(self, payment_id):
+        return self._call(self.client.payment.fetch, payment_id)
+
+
+class AsyncPaymentGateway:
+    """Awaitable facade over PaymentGateway for ASGI views.
+
+    Calls run in worker threads (the razorpay SDK is synchronous), capped
+    by a semaphore so a slow gateway can't exhaust the default executor.
+    """
+
+    def __init__(self, gateway, max_concurrency=None):
+        self.gateway = gateway
+        self._semaphore = asyncio.Semaphore(max_concurrency or settings.PAYMENT_GATEWAY_POOL_SIZE)
+
+    async def _run(self, func, *args, **kwargs):
+        async with self._semaphore:
+            return await asyncio.to_thread(func, *args, **kwargs)
+
+    async def create_order(self, amount, currency='INR', receipt=None):
+        return await self._run(self.gateway.create_order, amount, currency, receipt)
+
+    async def fetch_payment(self, payment_id):
+        return await self._run(self.gateway.fetch_payment, payment_id)
+
+
+_gateway = None
+_async_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway():
+    """Process-wide PaymentGateway, built on first use rather than at import"""
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                _gateway = PaymentGateway(
+                    settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET,
+                    base_url=settings.RAZORPAY_BASE_URL,
+                )
+    return _gateway
+
+
+def get_async_gateway():
+    """Process-wide AsyncPaymentGateway sharing the same session pool"""
+    global _async_gateway
+    if _async_gateway is None:
+        _async_gateway = AsyncPaymentGateway(get_gateway())
+    return _async_gateway
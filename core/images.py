@@ -0,0 +1,118 @@
+# core/images.py
+import hashlib
+import io
+import logging
+import posixpath
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, ImageOps
+
+from .cache import bump_catalogue_version
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVE_FORMATS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 6},
+    'jpeg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True},
+}
+
+
+def generate_derivatives(name, storage=default_storage, force=False):
+    """Write resized WebP and JPEG copies of the stored image `name`.
+
+    Derivative file names embed a hash of the original's bytes, so they can
+    be served with far-future cache headers and are never regenerated for
+    an unchanged image unless force is set. Widths are the configured
+    PROJECT_IMAGE_WIDTHS below the original's, plus the original width
+    itself when it is smaller than the largest of them. Returns the manifest stored on
+    Project.image_derivatives:
+
+        {'source': name, 'hash': ..., 'webp': [[width, name], ...], 'jpeg': [...]}
+    """
+    with storage.open(name, 'rb') as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()[:12]
+
+    image = ImageOps.exif_transpose(Image.open(io.BytesIO(data)))
+    widths = [w for w in settings.PROJECT_IMAGE_WIDTHS if w < image.width]
+    if image.width < max(settings.PROJECT_IMAGE_WIDTHS):
+        widths.append(image.width)
+    stem = posixpath.splitext(posixpath.basename(name))[0]
+    directory = posixpath.join(posixpath.dirname(name), 'derived')
+
+    manifest = {'source': name, 'hash': digest}
+    for ext, options in DERIVATIVE_FORMATS.items():
+        manifest[ext] = []
+        for width in widths:
+            target = posixpath.join(directory, f'{stem}-{digest}-{width}w.{ext}')
+            exists = storage.exists(target)
+            if force and exists:
+                # save() would pick a free name next to the old file instead of replacing it
+                storage.delete(target)
+            if force or not exists:
+                resized = image.copy()
+                resized.thumbnail((width, width * 4), Image.LANCZOS)
+                if ext == 'jpeg' and resized.mode != 'RGB':
+                    # JPEG has no alpha channel: flatten onto white
+                    background = Image.new('RGB', resized.size, (255, 255, 255))
+                    rgba = resized.convert('RGBA')
+                    background.paste(rgba, mask=rgba.split()[-1])
+                    resized = background
+                buffer = io.BytesIO()
+                resized.save(buffer, **options)
+                storage.save(target, ContentFile(buffer.getvalue()))
+            manifest[ext].append([width, target])
+    return manifest
+
+
+def update_project_derivatives(project):
+    """Regenerate project's derivatives if its image changed; returns True if updated
+
+    If generation fails (or the image was removed) the old manifest is
+    cleared, so pages fall back to the current original instead of the
+    previous image's derivatives.
+    """
+    from .models import Project
+
+    if project.image and project.image_derivatives.get('source') == project.image.name:
+        return False
+    manifest = {}
+    if project.image:
+        try:
+            manifest = generate_derivatives(project.image.name, project.image.storage)
+        except Exception:
+            logger.exception('Could not generate image derivatives for project %s', project.pk)
+    if manifest == project.image_derivatives:
+        return False
+    # update() so the derivative manifest doesn't bump updated_at or re-fire post_save
+    Project.objects.filter(pk=project.pk).update(image_derivatives=manifest)
+    project.image_derivatives = manifest
+    # The post_save bump ran before the manifest was written; pages cached since reference the old one
+    transaction.on_commit(bump_catalogue_version)
+    return bool(manifest)
+
+
+def optimize_png(path):
+    """Losslessly re-encode the PNG at path in place; returns (old_size, new_size).
+
+    Drops an alpha channel that is fully opaque and recompresses with
+    Pillow's optimizer. The file is only replaced if the result is smaller.
+    """
+    path = Path(path)
+    old_size = path.stat().st_size
+    with Image.open(path) as image:
+        image.load()
+    info = {key: image.info[key] for key in ('icc_profile', 'dpi', 'gamma') if key in image.info}
+    if image.mode == 'RGBA' and image.getextrema()[3] == (255, 255):
+        image = image.convert('RGB')
+
+    buffer = io.BytesIO()
+    image.save(buffer, 'PNG', optimize=True, **info)
+    if buffer.tell() >= old_size:
+        return old_size, old_size
+    path.write_bytes(buffer.getvalue())
+    return old_size, buffer.tell()
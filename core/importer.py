@@ -0,0 +1,255 @@
+# core/importer.py
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils.text import slugify
+
+from .models import Project
+from .slugs import assign_slugs
+
+# Input keys copied onto Project; anything else in a record is ignored
+IMPORT_FIELDS = [
+    'title', 'slug', 'short_description', 'long_description', 'technology', 'price',
+    'demo_video_link', 'is_active', 'featured',
+]
+FILE_FIELDS = ['image', 'project_file']
+
+# Columns overwritten when --on-conflict=update hits an existing slug. A record
+# imported without a file (--allow-missing-files) keeps the existing project's
+# file and is_active instead of blanking them
+UPSERT_FIELDS = [
+    'title', 'short_description', 'long_description', 'technology', 'price',
+    'demo_video_link', 'is_active', 'featured', 'image', 'project_file', 'updated_at',
+]
+
+
+def _iter_json_array(f, chunk_size=1 << 16):
+    """Yield the items of the first JSON array in f without loading the whole file.
+
+    Handles both a bare top-level array and a wrapper object such as
+    projects_sample.json's {"sample_projects": [...]}.
+    """
+    decoder = json.JSONDecoder()
+    buf = ''
+    while '[' not in buf:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            raise ValueError('No JSON array found')
+        buf += chunk
+    buf = buf[buf.index('[') + 1:]
+
+    while True:
+        buf = buf.lstrip().lstrip(',').lstrip()
+        if buf.startswith(']'):
+            return
+        try:
+            item, end = decoder.raw_decode(buf)
+        except json.JSONDecodeError:
+            # Item spans the chunk boundary
+            chunk = f.read(chunk_size)
+            if not chunk:
+                raise
+            buf += chunk
+            continue
+        yield item
+        buf = buf[end:]
+
+
+def read_records(path, fmt=None):
+    """Stream records from a .json array or a .jsonl file (one object per line)"""
+    if fmt is None:
+        fmt = 'jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'json'
+    with open(path, encoding='utf-8') as f:
+        if fmt == 'jsonl':
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from _iter_json_array(f)
+
+
+class ProjectImporter:
+    """Validate catalogue records and write them to Project in chunks.
+
+    Each chunk is one transaction: its slugs are allocated with one query,
+    its files are copied into MEDIA_ROOT by a thread pool, and its rows are
+    written with one bulk_create (in update mode, one per set of missing
+    files). A chunk is either fully imported, files included, or not at
+    all, so an interrupted run can resume from the last reported offset.
+
+    bulk_create skips Project.save and its signals; callers should bump the
+    catalogue cache version and backfill image derivatives afterwards.
+    """
+
+    def __init__(self, files_dir, on_conflict='error', allow_missing_files=False, workers=8, dry_run=False):
+        self.files_dir = files_dir
+        self.on_conflict = on_conflict
+        self.allow_missing_files = allow_missing_files
+        self.workers = workers
+        self.dry_run = dry_run
+        self._copied = {}
+
+    def build(self, record):
+        """Return an unsaved, validated Project for record; raises ValidationError"""
+        if not isinstance(record, dict):
+            raise ValidationError('Record is not an object')
+        fields = {key: record[key] for key in IMPORT_FIELDS if record.get(key) is not None}
+        if 'price' in fields:
+            try:
+                fields['price'] = Decimal(str(fields['price']))
+            except InvalidOperation:
+                raise ValidationError({'price': 'Not a number'})
+        project = Project(**fields)
+
+        missing = []
+        for field in FILE_FIELDS:
+            source = record.get(field)
+            if not source:
+                missing.append(field)
+                continue
+            path = os.path.join(self.files_dir, source)
+            if not os.path.isfile(path):
+                raise ValidationError({field: f'File not found: {path}'})
+            # Replaced with the stored name in copy_files
+            setattr(project, field, path)
+        if missing:
+            if not self.allow_missing_files:
+                raise ValidationError({field: 'This field is required.' for field in missing})
+            # Unsellable until files are uploaded through the admin
+            project.is_active = False
+
+        project.full_clean(exclude=['slug'] + FILE_FIELDS, validate_unique=False)
+        return project
+
+    def _copy(self, field, path):
+        upload_to = Project._meta.get_field(field).upload_to
+        with open(path, 'rb') as f:
+            return default_storage.save(os.path.join(upload_to, os.path.basename(path)), File(f))
+
+    def copy_files(self, projects):
+        """Copy each distinct source file into storage once and point projects at the copies
+
+        Returns the keys copied by this call, for discard_files.
+        """
+        pending = {
+            (field, getattr(project, field).name)
+            for project in projects for field in FILE_FIELDS
+            if getattr(project, field) and (field, getattr(project, field).name) not in self._copied
+        }
+        copied = []
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {key: pool.submit(self._copy, *key) for key in pending}
+        errors = []
+        for key, future in futures.items():
+            try:
+                self._copied[key] = future.result()
+            except Exception as e:
+                errors.append(e)
+            else:
+                copied.append(key)
+        if errors:
+            self.discard_files(copied)
+            raise errors[0]
+        for project in projects:
+            for field in FILE_FIELDS:
+                if getattr(project, field):
+                    setattr(project, field, self._copied[(field, getattr(project, field).name)])
+        return copied
+
+    def discard_files(self, keys):
+        """Delete copies made by copy_files that no imported row references"""
+        for key in keys:
+            default_storage.delete(self._copied.pop(key))
+
+    def match_existing(self, projects):
+        """Point slugless projects at the existing project whose slug is slugify(title)
+
+        In skip and update mode a record without a slug is matched on
+        slugify(title), so re-importing it hits the same row instead of
+        allocating a new `-1` slug; only unmatched records get new slugs.
+        """
+        keys = {
+            id(project): slugify(project.title) or 'project' for project in projects if not project.slug
+        }
+        existing = set(Project.objects.filter(slug__in=set(keys.values())).values_list('slug', flat=True))
+        for project in projects:
+            if keys.get(id(project)) in existing:
+                project.slug = keys[id(project)]
+
+    def _skipped(self, projects):
+        """Projects of a skip-mode chunk whose slug is taken by another row"""
+        stored = set(
+            Project.objects.filter(slug__in=[project.slug for project in projects])
+            .values_list('slug', 'image', 'project_file')
+        )
+        return [
+            project for project in projects
+            if (project.slug, project.image.name or '', project.project_file.name or '') not in stored
+        ]
+
+    def write_chunk(self, projects):
+        """Import one chunk of validated projects; returns the number of rows written
+
+        Files are copied once the rows to write are known, and the copies
+        are deleted again if the chunk rolls back, so neither skipped
+        records nor failed chunks leave files behind in storage.
+        """
+        if self.dry_run or not projects:
+            return 0
+        copied = []
+        try:
+            with transaction.atomic():
+                if self.on_conflict in ('skip', 'update'):
+                    self.match_existing(projects)
+                assign_slugs(Project.objects.all(), projects)
+                if self.on_conflict == 'skip':
+                    existing = set(
+                        Project.objects.filter(slug__in=[project.slug for project in projects])
+                        .values_list('slug', flat=True)
+                    )
+                    # The first record of a slug wins, as with ON CONFLICT DO NOTHING
+                    unique = {}
+                    for project in projects:
+                        if project.slug not in existing:
+                            unique.setdefault(project.slug, project)
+                    projects = list(unique.values())
+                    copied = self.copy_files(projects)
+                    Project.objects.bulk_create(projects, ignore_conflicts=True)
+                    # A concurrent import may have taken some of the slugs since
+                    skipped = {id(project) for project in self._skipped(projects)}
+                    if skipped:
+                        projects = [project for project in projects if id(project) not in skipped]
+                        used = {
+                            (field, getattr(project, field).name)
+                            for project in projects for field in FILE_FIELDS
+                        }
+                        orphans = [key for key in copied if (key[0], self._copied[key]) not in used]
+                        self.discard_files(orphans)
+                        copied = [key for key in copied if key not in orphans]
+                elif self.on_conflict == 'update':
+                    # One row per slug: an upsert can't update the same row twice; the last record wins
+                    projects = list({project.slug: project for project in projects}.values())
+                    copied = self.copy_files(projects)
+                    groups = {}
+                    for project in projects:
+                        missing = tuple(field for field in FILE_FIELDS if not getattr(project, field))
+                        groups.setdefault(missing, []).append(project)
+                    for missing, group in groups.items():
+                        keep = set(missing) | ({'is_active'} if missing else set())
+                        Project.objects.bulk_create(
+                            group, update_conflicts=True, unique_fields=['slug'],
+                            update_fields=[field for field in UPSERT_FIELDS if field not in keep],
+                        )
+                else:
+                    copied = self.copy_files(projects)
+                    Project.objects.bulk_create(projects)
+        except BaseException:
+            self.discard_files(copied)
+            raise
+        return len(projects)
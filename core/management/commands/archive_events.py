@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.partitions import MONTHS_AHEAD, add_months, archive_before, ensure_partitions, restore_partition
+
+
+class Command(BaseCommand):
+    help = ('Create upcoming monthly Download/PaymentTransaction partitions and move expired ones '
+            'to gzipped files, or load an archived partition back with --restore')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months', type=int, default=settings.EVENT_RETENTION_MONTHS,
+                            help='Keep this many months before the current one in the database')
+        parser.add_argument('--directory', default=settings.EVENT_ARCHIVE_DIR, help='Where archive files are written')
+        parser.add_argument('--months-ahead', type=int, default=MONTHS_AHEAD,
+                            help='Create partitions this many months past the current one')
+        parser.add_argument('--dry-run', action='store_true', help='List the partitions that would be archived')
+        parser.add_argument('--restore', metavar='FILE', nargs='+', help='Archive file(s) to load back into the database')
+
+    def handle(self, *args, **options):
+        if options['restore']:
+            for path in options['restore']:
+                try:
+                    name, rows = restore_partition(path)
+                except (OSError, ValueError) as e:
+                    raise CommandError(f'Could not restore {path}: {e}')
+                self.stdout.write(self.style.SUCCESS(f'Restored {rows} rows into {name}'))
+            return
+
+        if not options['dry_run']:
+            ensure_partitions(options['months_ahead'])
+        cutoff = add_months(timezone.now().date().replace(day=1), -options['months'])
+        archived = 0
+        try:
+            for table, month, name, path, rows in archive_before(cutoff, options['directory'], options['dry_run']):
+                if options['dry_run']:
+                    self.stdout.write(f'Would archive {name}')
+                else:
+                    archived += 1
+                    self.stdout.write(f'Archived {rows} rows from {name} to {path}')
+        except OSError as e:
+            raise CommandError(f'Archiving stopped after {archived} partitions: {e}')
+        if not options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f'Done: {archived} partitions archived, keeping {cutoff:%Y-%m} onwards'))
@@ -0,0 +1,38 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.template import Context, Template
+
+from core.models import Project
+from core.templatetags.project_tags import _card_key
+
+GRID = Template('{% load project_tags %}{% project_cards projects show_stats=True %}')
+
+
+class Command(BaseCommand):
+    help = 'Time rendering a project list page worth of cards with the card cache cold and warm'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=200, help='Renders timed per mode (at least 2)')
+
+    def handle(self, *args, **options):
+        projects = list(Project.objects.filter(is_active=True).order_by('-created_at', '-id')[:settings.PAGINATE_BY])
+        if not projects:
+            raise CommandError('No active projects to render')
+        keys = [_card_key(project, True, False) for project in projects]
+
+        for mode in ('cold', 'warm'):
+            timings = []
+            for _ in range(options['repeat']):
+                if mode == 'cold':
+                    cache.delete_many(keys)
+                started = time.perf_counter()
+                GRID.render(Context({'projects': projects}))
+                timings.append((time.perf_counter() - started) * 1000)
+            self.stdout.write(
+                f'{len(projects)} cards, {mode} cache: median {statistics.median(timings):.2f} ms  '
+                f'p95 {statistics.quantiles(timings, n=20)[-1]:.2f} ms'
+            )
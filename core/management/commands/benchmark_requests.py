@@ -0,0 +1,68 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import Client, override_settings
+
+# Connection settings applied to DATABASES['default'] per mode; 'configured'
+# keeps backend/settings.py as is, e.g. to measure DB_POOL=True or a DB_PORT
+# pointing at pgbouncer
+MODES = {
+    'per-request': {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False},
+    'persistent': {'CONN_MAX_AGE': 60, 'CONN_HEALTH_CHECKS': False},
+    'persistent+health-checks': {'CONN_MAX_AGE': 60, 'CONN_HEALTH_CHECKS': True},
+    'configured': {},
+}
+
+
+class Command(BaseCommand):
+    help = 'Measure requests per second on a page for each database connection mode'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/projects/', help='Page requested (default: /projects/)')
+        parser.add_argument('--requests', type=int, default=2000, help='Requests per mode')
+        parser.add_argument('--threads', type=int, default=8, help='Concurrent clients, like gunicorn threads')
+        parser.add_argument('--mode', action='append', dest='modes', choices=list(MODES), help='Mode to measure, repeatable (default: all)')
+        parser.add_argument('--cache', action='store_true', help='Keep the catalogue cache; by default every request renders and queries')
+
+    def handle(self, *args, **options):
+        overrides = {'ALLOWED_HOSTS': ['testserver'], 'SECURE_SSL_REDIRECT': False}
+        if not options['cache']:
+            overrides['CATALOGUE_CACHE_TIMEOUT'] = 0
+        with override_settings(**overrides):
+            for mode in options['modes'] or MODES:
+                rate, errors = self._measure(MODES[mode], options['path'], options['requests'], options['threads'])
+                self.stdout.write(f'{mode:26} {rate:8.0f} req/s  {errors} errors')
+
+    def _measure(self, database, path, requests, threads):
+        settings_dict = connections['default'].settings_dict
+        saved = {key: settings_dict[key] for key in database}
+        settings_dict.update(database)
+        remaining = [requests]
+        errors = []
+        lock = threading.Lock()
+
+        def work():
+            # Each thread has its own connection, as each gunicorn worker thread does
+            client = Client()
+            try:
+                while True:
+                    with lock:
+                        if not remaining[0]:
+                            return
+                        remaining[0] -= 1
+                    if client.get(path).status_code != 200:
+                        errors.append(path)
+            finally:
+                connections.close_all()
+
+        workers = [threading.Thread(target=work) for _ in range(threads)]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+        settings_dict.update(saved)
+        return requests / elapsed, len(errors)
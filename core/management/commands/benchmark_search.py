@@ -0,0 +1,78 @@
+import random
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.db import connection, transaction
+from django.db.models import Q
+
+from core.models import Project
+from core.search import search_projects
+
+WORDS = '''
+    inventory management system hospital library student attendance face recognition chat
+    application ecommerce portal weather prediction stock market analysis blockchain voting
+    parking booking sentiment detection traffic signal crop disease fraud credit card loan
+    approval resume screening music recommendation movie review news classification spam
+    email fitness tracker expense splitter quiz generator timetable scheduler canteen ordering
+    pharmacy billing payroll employee leave tracking bus pass railway reservation hotel
+    restaurant delivery courier warehouse supply chain chatbot virtual assistant handwriting
+    digit object tracking lane emotion speech translator captioning plagiarism checker
+'''.split()
+DEFAULT_TERMS = ['inventory management', 'face recognition', 'blockchain', 'recogniton', 'hospital booking']
+
+
+def legacy_search(queryset, query):
+    """The icontains ORs project_list_view used before core.search"""
+    return queryset.filter(
+        Q(title__icontains=query) | Q(short_description__icontains=query) | Q(technology__icontains=query)
+    ).order_by('-created_at')
+
+
+class Command(BaseCommand):
+    help = 'Time catalogue search pages: ranked full-text search against the old icontains filter'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projects', type=int, default=100_000, help='Synthetic projects added for the run and rolled back afterwards (default: 100000)')
+        parser.add_argument('--term', action='append', dest='terms', help=f'Search term, repeatable (default: {", ".join(DEFAULT_TERMS)})')
+        parser.add_argument('--repeat', type=int, default=20, help='Page renders timed per term and path (at least 2)')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self._seed(options['projects'])
+            for term in options['terms'] or DEFAULT_TERMS:
+                for name, search in (('icontains', legacy_search), ('full-text', search_projects)):
+                    self._time(name, term, search, options['repeat'])
+            transaction.set_rollback(True)
+
+    def _seed(self, count):
+        rng = random.Random(0)
+        technologies = [choice for choice, _ in Project.TECHNOLOGY_CHOICES]
+        for start in range(0, count, 5000):
+            Project.objects.bulk_create([
+                Project(
+                    title=' '.join(rng.sample(WORDS, 3)).title(), slug=f'benchmark-search-{n}',
+                    short_description=' '.join(rng.sample(WORDS, 6)),
+                    long_description=' '.join(rng.choices(WORDS, k=12)),
+                    technology=rng.choice(technologies), price=499,
+                )
+                for n in range(start, min(start + 5000, count))
+            ])
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Project._meta.db_table}')
+        self.stdout.write(f'{Project.objects.count()} projects')
+
+    def _time(self, name, term, search, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            # What project_list_view evaluates: the count and the first page
+            page = Paginator(search(Project.objects.filter(is_active=True), term), settings.PAGINATE_BY).get_page(1)
+            list(page)
+            timings.append((time.perf_counter() - started) * 1000)
+        self.stdout.write(
+            f'{term!r:24} {name:10} {page.paginator.count:7} hits  '
+            f'median {statistics.median(timings):8.1f} ms  p95 {statistics.quantiles(timings, n=20)[-1]:8.1f} ms'
+        )
@@ -0,0 +1,67 @@
+import sys
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.exports import FORMATS, iter_export
+from core.models import Download, Order, PaymentTransaction
+
+# name: (model, date field filtered by --since/--until)
+SOURCES = {
+    'orders': (Order, 'created_at'),
+    'transactions': (PaymentTransaction, 'created_at'),
+    'downloads': (Download, 'downloaded_at'),
+}
+
+
+class Command(BaseCommand):
+    help = 'Stream orders, payment transactions or downloads to a CSV or JSON Lines file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', choices=SOURCES)
+        parser.add_argument('--format', choices=FORMATS, default='csv')
+        parser.add_argument('--gzip', action='store_true', help='Compress the output with gzip')
+        parser.add_argument('--output', '-o', help='File to write (default: stdout)')
+        parser.add_argument('--since', help='Only rows on or after this date (YYYY-MM-DD)')
+        parser.add_argument('--until', help='Only rows before this date (YYYY-MM-DD)')
+        parser.add_argument('--status', help='Only orders or transactions with this status')
+        parser.add_argument('--chunk-size', type=int, help='Rows per cursor fetch (default: EXPORT_CHUNK_SIZE)')
+
+    def _day(self, value):
+        try:
+            day = datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError(f'Invalid date: {value} (expected YYYY-MM-DD)')
+        return timezone.make_aware(datetime.combine(day, datetime.min.time()))
+
+    def handle(self, *args, **options):
+        model, date_field = SOURCES[options['source']]
+        queryset = model.objects.order_by('pk')
+        if options['since']:
+            queryset = queryset.filter(**{f'{date_field}__gte': self._day(options['since'])})
+        if options['until']:
+            queryset = queryset.filter(**{f'{date_field}__lt': self._day(options['until'])})
+        if options['status']:
+            if model is Download:
+                raise CommandError('Downloads have no status')
+            queryset = queryset.filter(status=options['status'])
+
+        chunks = iter_export(
+            queryset, fmt=options['format'], compress=options['gzip'], chunk_size=options['chunk_size'],
+        )
+        started = time.monotonic()
+        written = 0
+        out = open(options['output'], 'wb') if options['output'] else sys.stdout.buffer
+        try:
+            for chunk in chunks:
+                out.write(chunk)
+                written += len(chunk)
+        finally:
+            if options['output']:
+                out.close()
+            else:
+                out.flush()
+        if options['output']:
+            self.stderr.write(f'Wrote {written:,} bytes to {options["output"]} in {time.monotonic() - started:.1f}s')
@@ -0,0 +1,86 @@
+import json
+import random
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+
+class FakeGatewayHandler(BaseHTTPRequestHandler):
+    """Minimal Razorpay API stand-in: POST /v1/orders, GET /v1/payments/<id>"""
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real API
+    latency = 0.0
+    error_rate = 0.0
+
+    def _respond(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _simulate(self):
+        if self.latency:
+            time.sleep(self.latency)
+        if random.random() < self.error_rate:
+            self._respond(500, {'error': {'code': 'SERVER_ERROR', 'description': 'Simulated failure'}})
+            return False
+        return True
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        data = json.loads(self.rfile.read(length) or b'{}')
+        if not self._simulate():
+            return
+        if self.path.rstrip('/') != '/v1/orders':
+            return self._respond(404, {'error': {'code': 'BAD_REQUEST_ERROR', 'description': 'Not found'}})
+        self._respond(200, {
+            'id': f'order_{uuid.uuid4().hex[:14]}',
+            'entity': 'order',
+            'amount': data.get('amount'),
+            'currency': data.get('currency', 'INR'),
+            'receipt': data.get('receipt'),
+            'status': 'created',
+            'created_at': int(time.time()),
+        })
+
+    def do_GET(self):
+        if not self._simulate():
+            return
+        prefix = '/v1/payments/'
+        if not self.path.startswith(prefix):
+            return self._respond(404, {'error': {'code': 'BAD_REQUEST_ERROR', 'description': 'Not found'}})
+        self._respond(200, {
+            'id': self.path[len(prefix):].split('?')[0],
+            'entity': 'payment',
+            'status': 'captured',
+        })
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = 'Run a local fake Razorpay API for offline load testing (set RAZORPAY_BASE_URL to http://HOST:PORT)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency', type=float, default=0.0, help='Seconds to wait before each response')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with a 500')
+
+    def handle(self, *args, **options):
+        handler = type('Handler', (FakeGatewayHandler,), {
+            'latency': options['latency'],
+            'error_rate': options['error_rate'],
+        })
+        server = ThreadingHTTPServer((options['host'], options['port']), handler)
+        self.stdout.write(f"Fake payment gateway on http://{options['host']}:{options['port']}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
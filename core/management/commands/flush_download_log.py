@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.audit import download_log
+
+
+class Command(BaseCommand):
+    help = 'Write download events left on disk by stopped or crashed workers to the database'
+
+    def handle(self, *args, **options):
+        download_log.flush()
+        self.stdout.write('Download log flushed')
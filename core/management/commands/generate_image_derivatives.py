@@ -0,0 +1,51 @@
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from django.core.management.base import BaseCommand
+
+from core.cache import bump_catalogue_version
+from core.images import generate_derivatives
+from core.models import Project
+
+
+def _generate(project_id, name, force):
+    # Runs in a worker process: file work only, the parent does the DB writes
+    try:
+        return project_id, generate_derivatives(name, force=force), None
+    except Exception as e:
+        return project_id, None, str(e)
+
+
+class Command(BaseCommand):
+    help = 'Generate missing responsive WebP/JPEG derivatives for project images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: one per CPU)')
+        parser.add_argument('--force', action='store_true', help='Rewrite every derivative, even if the manifest and files are up to date')
+
+    def handle(self, *args, **options):
+        pending = [
+            (pk, image) for pk, image, derivatives
+            in Project.objects.exclude(image='').values_list('id', 'image', 'image_derivatives').iterator()
+            if options['force'] or (derivatives or {}).get('source') != image
+        ]
+        if not pending:
+            self.stdout.write('All project images are up to date')
+            return
+
+        done = failed = 0
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            ids, images = zip(*pending)
+            for project_id, manifest, error in pool.map(_generate, ids, images, repeat(options['force']), chunksize=16):
+                if error:
+                    failed += 1
+                    self.stderr.write(f'Project {project_id}: {error}')
+                    continue
+                Project.objects.filter(pk=project_id).update(image_derivatives=manifest)
+                done += 1
+                if done % 100 == 0:
+                    self.stdout.write(f'{done}/{len(pending)} projects done')
+
+        # Cached pages still reference the original images
+        bump_catalogue_version()
+        self.stdout.write(self.style.SUCCESS(f'Generated derivatives for {done} projects, {failed} failed'))
@@ -0,0 +1,77 @@
+import os
+import time
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from core.cache import bump_catalogue_version
+from core.importer import ProjectImporter, read_records
+
+
+class Command(BaseCommand):
+    help = 'Stream projects from a JSON or JSONL catalogue into the database in chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Catalogue file: a JSON array (optionally wrapped in an object) or JSONL')
+        parser.add_argument('--format', choices=['json', 'jsonl'], help='Input format (default: from the file extension)')
+        parser.add_argument('--files-dir', help='Directory image/project_file paths are relative to (default: the catalogue\'s directory)')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--offset', type=int, default=0, help='Skip this many records, to resume an interrupted import')
+        parser.add_argument('--on-conflict', choices=['error', 'skip', 'update'], default='error',
+                            help='What to do when a record\'s slug already exists: fail, skip the record or overwrite the project')
+        parser.add_argument('--allow-missing-files', action='store_true',
+                            help='Import records without image/project_file as inactive projects')
+        parser.add_argument('--workers', type=int, default=8, help='Threads copying files into MEDIA_ROOT')
+        parser.add_argument('--dry-run', action='store_true', help='Validate only')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.isfile(path):
+            raise CommandError(f'No such file: {path}')
+        importer = ProjectImporter(
+            files_dir=options['files_dir'] or os.path.dirname(os.path.abspath(path)),
+            on_conflict=options['on_conflict'],
+            allow_missing_files=options['allow_missing_files'],
+            workers=options['workers'],
+            dry_run=options['dry_run'],
+        )
+
+        records = islice(read_records(path, options['format']), options['offset'], None)
+        offset = options['offset']
+        imported = invalid = 0
+        started = time.monotonic()
+        try:
+            while True:
+                chunk = list(islice(records, options['chunk_size']))
+                if not chunk:
+                    break
+                projects = []
+                for position, record in enumerate(chunk, start=offset):
+                    try:
+                        projects.append(importer.build(record))
+                    except ValidationError as e:
+                        invalid += 1
+                        errors = (
+                            [f'{field}: {" ".join(messages)}' for field, messages in e.message_dict.items()]
+                            if hasattr(e, 'error_dict') else e.messages
+                        )
+                        self.stderr.write(f'Record {position}: {"; ".join(errors)}')
+                try:
+                    imported += importer.write_chunk(projects)
+                except IntegrityError as e:
+                    raise CommandError(f'Chunk at offset {offset} was not imported: {e}; resume with --offset {offset}')
+                offset += len(chunk)
+
+                rate = (offset - options['offset']) / max(time.monotonic() - started, 1e-6)
+                self.stdout.write(f'Offset {offset}: {imported} imported, {invalid} invalid ({rate:,.0f} records/s)')
+        except ValueError as e:
+            raise CommandError(f'Could not parse the catalogue after record {offset}: {e}')
+        finally:
+            if imported:
+                bump_catalogue_version()
+
+        self.stdout.write(self.style.SUCCESS(f'Done: {imported} imported, {invalid} invalid'))
+        if imported:
+            self.stdout.write('Run generate_image_derivatives to build responsive images for the new projects')
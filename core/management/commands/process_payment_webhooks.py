@@ -0,0 +1,28 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.webhooks import process_webhook_events
+
+
+class Command(BaseCommand):
+    help = 'Apply stored payment webhook events to orders in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.WEBHOOK_BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true', help='Keep polling for new events instead of exiting when none are pending')
+        parser.add_argument('--interval', type=float, default=2, help='Seconds to sleep between polls in --loop mode')
+
+    def handle(self, *args, **options):
+        while True:
+            handled = process_webhook_events(options['batch_size'])
+            if handled:
+                self.stdout.write(f'Processed {handled} events')
+            if handled < options['batch_size']:
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+                # Drop expired or broken connections between polls, as a request would
+                close_old_connections()
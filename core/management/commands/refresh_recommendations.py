@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from core.cache import bump_catalogue_version
+from core.recommendations import refresh_recommendations
+
+
+class Command(BaseCommand):
+    help = 'Recompute co-purchase recommendations for projects with new or changed orders'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Rebuild every project instead of only those with order changes')
+        parser.add_argument('--top', type=int, default=None, help='Neighbours kept per project (default: RECOMMENDATIONS_PER_PROJECT)')
+
+    def handle(self, *args, **options):
+        refreshed = refresh_recommendations(full=options['full'], top_n=options['top'])
+        if refreshed:
+            # Detail pages cache their related projects
+            bump_catalogue_version()
+        self.stdout.write(f'Refreshed recommendations for {refreshed} projects')
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.analytics import rollup_analytics
+
+
+class Command(BaseCommand):
+    help = 'Recompute the daily analytics rollups of days with new orders, payments or downloads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep rolling up new rows instead of exiting')
+        parser.add_argument('--interval', type=float, default=300, help='Seconds to sleep between runs in --loop mode')
+
+    def handle(self, *args, **options):
+        while True:
+            consumed = rollup_analytics()
+            self.stdout.write(f'Rolled up {consumed} new rows')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+            # Drop expired or broken connections between polls, as a request would
+            close_old_connections()
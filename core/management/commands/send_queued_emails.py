@@ -0,0 +1,29 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.emails import send_queued_emails
+
+
+class Command(BaseCommand):
+    help = 'Send pending emails from the outbox in batches over one SMTP connection'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.EMAIL_OUTBOX_BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true', help='Keep polling the outbox instead of exiting when it is empty')
+        parser.add_argument('--interval', type=float, default=5, help='Seconds to sleep between polls in --loop mode')
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = send_queued_emails(options['batch_size'])
+            if sent or failed:
+                self.stdout.write(f'Sent {sent}, failed {failed}')
+            if sent + failed < options['batch_size']:
+                # Outbox drained (or every row is waiting on backoff)
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+                # Drop expired or broken connections between polls, as a request would
+                close_old_connections()
@@ -0,0 +1,49 @@
+import os
+
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management.base import BaseCommand, CommandError
+
+
+def _size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return None
+
+
+def _fmt(size):
+    return '-' if size is None else f'{size:,}'
+
+
+class Command(BaseCommand):
+    help = 'Report source, collected, gzip and brotli sizes of every collected static asset'
+
+    def handle(self, *args, **options):
+        hashed_files = staticfiles_storage.hashed_files
+        if not hashed_files:
+            raise CommandError('No staticfiles manifest found; run collectstatic first')
+
+        totals = {'source': 0, 'served': 0}
+        self.stdout.write(f'{"asset":<50} {"source":>12} {"collected":>12} {"gzip":>12} {"brotli":>12} {"saved":>7}')
+        for name, hashed_name in sorted(hashed_files.items()):
+            source = _size(finders.find(name) or '')
+            path = staticfiles_storage.path(hashed_name)
+            collected = _size(path)
+            gzip, brotli = _size(path + '.gz'), _size(path + '.br')
+            # What a client that accepts br/gzip actually downloads
+            served = min(s for s in (collected, gzip, brotli) if s is not None) if collected else None
+            saved = ''
+            if source and served is not None:
+                totals['source'] += source
+                totals['served'] += served
+                saved = f'{100 - served * 100 / source:.0f}%'
+            self.stdout.write(
+                f'{name:<50} {_fmt(source):>12} {_fmt(collected):>12} {_fmt(gzip):>12} {_fmt(brotli):>12} {saved:>7}'
+            )
+
+        saved = totals['source'] - totals['served']
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(hashed_files)} assets: {totals["source"]:,} source bytes, '
+            f'{totals["served"]:,} served, {saved:,} saved'
+        ))
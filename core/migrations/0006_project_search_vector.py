@@ -0,0 +1,62 @@
+# Generated by Django 5.0.1 on 2026-10-17 00:49
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+# Keep search_vector in sync on every write path (save, update, bulk_create)
+SEARCH_VECTOR_TRIGGER = """
+CREATE FUNCTION core_project_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.technology, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(NEW.short_description, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(NEW.long_description, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER core_project_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, technology, short_description, long_description
+    ON core_project
+    FOR EACH ROW EXECUTE FUNCTION core_project_search_vector_update();
+
+UPDATE core_project SET title = title;
+"""
+
+DROP_SEARCH_VECTOR_TRIGGER = """
+DROP TRIGGER IF EXISTS core_project_search_vector_trigger ON core_project;
+DROP FUNCTION IF EXISTS core_project_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_remove_project_technologies_project_long_description_and_more'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='project',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='project_search_vector_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['title'], name='project_title_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['short_description'], name='project_short_desc_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.RunSQL(SEARCH_VECTOR_TRIGGER, DROP_SEARCH_VECTOR_TRIGGER),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.0.1 on 2026-10-17 00:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_project_search_vector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='download',
+            index=models.Index(fields=['-downloaded_at'], name='download_recent'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['user', 'status', '-created_at'], name='order_user_status_recent'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['razorpay_order_id'], name='order_razorpay_order_id'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_at', '-id'], name='project_active_recent'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['technology', '-created_at', '-id'], name='project_active_tech_recent'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(condition=models.Q(('featured', True), ('is_active', True)), fields=['-created_at'], name='project_featured_recent'),
+        ),
+        migrations.AddConstraint(
+            model_name='order',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'completed')), fields=('user', 'project'), name='unique_completed_order_per_user_project'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.0.1 on 2026-10-17 01:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_entitlements(apps, schema_editor):
+    """One entitlement per (user, project) with a completed order, from its earliest order"""
+    Order = apps.get_model('core', 'Order')
+    Entitlement = apps.get_model('core', 'Entitlement')
+    seen = set()
+    batch = []
+    for order_pk, user_id, project_id in (
+        Order.objects.filter(status='completed').order_by('created_at')
+        .values_list('pk', 'user_id', 'project_id').iterator()
+    ):
+        if (user_id, project_id) in seen:
+            continue
+        seen.add((user_id, project_id))
+        batch.append(Entitlement(user_id=user_id, project_id=project_id, order_id=order_pk))
+        if len(batch) >= 1000:
+            Entitlement.objects.bulk_create(batch)
+            batch = []
+    Entitlement.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_projectrecommendation_watermark'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Entitlement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granted_at', models.DateTimeField(auto_now_add=True)),
+                ('order', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='entitlement', to='core.order')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entitlements', to='core.project')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entitlements', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-granted_at'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='entitlement',
+            constraint=models.UniqueConstraint(fields=('user', 'project'), name='unique_entitlement'),
+        ),
+        migrations.RunPython(backfill_entitlements, migrations.RunPython.noop),
+    ]
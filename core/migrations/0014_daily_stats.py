@@ -0,0 +1,67 @@
+# Generated by Django 5.0.1 on 2026-10-17 01:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_entitlement'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyTechnologyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('orders_created', models.PositiveIntegerField(default=0)),
+                ('orders_completed', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('downloads', models.PositiveIntegerField(default=0)),
+                ('technology', models.CharField(choices=[('Python', 'Python'), ('Java', 'Java'), ('Web Development', 'Web Development'), ('Machine Learning', 'Machine Learning'), ('Gen AI', 'Generative AI'), ('Android', 'Android Development'), ('Data Science', 'Data Science'), ('Blockchain', 'Blockchain'), ('AR/VR', 'AR/VR'), ('Embedded Systems', 'Embedded Systems')], max_length=50)),
+            ],
+            options={
+                'verbose_name_plural': 'daily technology stats',
+                'ordering': ['-date'],
+                'abstract': False,
+            },
+        ),
+        migrations.AddField(
+            model_name='watermark',
+            name='position',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='watermark',
+            name='value',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='DailyProjectStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('orders_created', models.PositiveIntegerField(default=0)),
+                ('orders_completed', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('downloads', models.PositiveIntegerField(default=0)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='core.project')),
+            ],
+            options={
+                'verbose_name': 'analytics',
+                'verbose_name_plural': 'analytics',
+                'ordering': ['-date'],
+                'abstract': False,
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailytechnologystats',
+            constraint=models.UniqueConstraint(fields=('date', 'technology'), name='unique_daily_technology_stats'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyprojectstats',
+            constraint=models.UniqueConstraint(fields=('date', 'project'), name='unique_daily_project_stats'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.0.1 on 2026-10-17 01:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_daily_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='download',
+            name='download_recent',
+        ),
+        migrations.AddIndex(
+            model_name='download',
+            index=models.Index(fields=['-downloaded_at', '-id'], name='download_recent'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['-created_at', '-id'], name='order_recent'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['razorpay_payment_id'], name='order_razorpay_payment_id'),
+        ),
+        migrations.AddIndex(
+            model_name='paymenttransaction',
+            index=models.Index(fields=['-created_at', '-id'], name='transaction_recent'),
+        ),
+    ]
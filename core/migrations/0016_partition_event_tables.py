@@ -0,0 +1,109 @@
+# Generated by Django 5.0.1 on 2026-10-17 01:35
+
+from datetime import date
+
+from django.db import migrations, models
+from django.utils import timezone
+
+# Frozen copies of core.partitions as of this migration, so later changes
+# there can't alter what it does
+PARTITIONED_TABLES = {
+    'core_download': 'downloaded_at',
+    'core_paymenttransaction': 'created_at',
+}
+MONTHS_AHEAD = 3
+
+
+def add_months(month, n):
+    index = month.year * 12 + month.month - 1 + n
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table, month):
+    return f'{table}_p{month:%Y%m}'
+
+
+def create_partition(cursor, table, month):
+    cursor.execute(
+        f'CREATE TABLE IF NOT EXISTS {partition_name(table, month)} PARTITION OF {table} '
+        f"FOR VALUES FROM ('{month:%Y-%m-%d} 00:00:00+00') TO ('{add_months(month, 1):%Y-%m-%d} 00:00:00+00')"
+    )
+
+
+def _rebuild(cursor, table, column, partitioned):
+    """Copy table into a new (un)partitioned table of the same name, keeping its indexes and FKs"""
+    old = f'{table}_old'
+    cursor.execute(
+        'SELECT pg_get_indexdef(i.indexrelid) FROM pg_index i '
+        'WHERE i.indrelid = %s::regclass AND NOT i.indisprimary',
+        [table],
+    )
+    indexes = [definition.replace(' ON ONLY ', ' ON ') for (definition,) in cursor.fetchall()]
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'",
+        [table],
+    )
+    foreign_keys = cursor.fetchall()
+
+    cursor.execute(f'ALTER TABLE {table} RENAME TO {old}')
+    cursor.execute(
+        f'CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS INCLUDING IDENTITY)'
+        + (f' PARTITION BY RANGE ({column})' if partitioned else '')
+    )
+    if partitioned:
+        # Partitions for every month with rows, up to MONTHS_AHEAD from now
+        cursor.execute(f"SELECT date_trunc('month', min({column}) AT TIME ZONE 'UTC')::date FROM {old}")
+        first = cursor.fetchone()[0]
+        this_month = timezone.now().date().replace(day=1)
+        month = min(first, this_month) if first else this_month
+        while month <= add_months(this_month, MONTHS_AHEAD):
+            create_partition(cursor, table, month)
+            month = add_months(month, 1)
+        cursor.execute(f'CREATE TABLE {table}_default PARTITION OF {table} DEFAULT')
+
+    cursor.execute(f'INSERT INTO {table} SELECT * FROM {old}')
+    cursor.execute(f'DROP TABLE {old}')
+    # A partitioned table's primary key must include the partition key
+    key = f'id, {column}' if partitioned else 'id'
+    cursor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY ({key})')
+    for definition in indexes:
+        cursor.execute(definition)
+    for name, definition in foreign_keys:
+        cursor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {name} {definition}')
+    cursor.execute(f"SELECT pg_get_serial_sequence('{table}', 'id')")
+    sequence = cursor.fetchone()[0]
+    cursor.execute(f'ALTER SEQUENCE {sequence} RENAME TO {table}_id_seq')
+    cursor.execute(f"SELECT setval('{table}_id_seq', coalesce(max(id), 0) + 1, false) FROM {table}")
+
+
+def partition_tables(apps, schema_editor):
+    # Declarative partitioning is Postgres-only; other databases keep plain tables
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table, column in PARTITIONED_TABLES.items():
+            _rebuild(cursor, table, column, partitioned=True)
+
+
+def unpartition_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table, column in PARTITIONED_TABLES.items():
+            _rebuild(cursor, table, column, partitioned=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_admin_changelist_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='paymenttransaction',
+            name='transaction_id',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+        migrations.RunPython(partition_tables, unpartition_tables),
+    ]
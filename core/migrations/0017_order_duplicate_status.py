@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-17 01:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_partition_event_tables'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='order',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('completed', 'Completed'), ('failed', 'Failed'), ('refunded', 'Refunded'), ('duplicate', 'Duplicate (refund due)')], default='pending', max_length=20),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.1 on 2026-10-17 02:10
+
+from django.db import migrations
+
+
+def resolve_duplicate_completed_orders(apps, schema_editor):
+    """Keep the earliest completed order per (user, project); mark the rest 'duplicate' for refund"""
+    Order = apps.get_model('core', 'Order')
+    seen = set()
+    duplicates = []
+    for order_pk, user_id, project_id in (
+        Order.objects.filter(status='completed').order_by('created_at', 'pk')
+        .values_list('pk', 'user_id', 'project_id').iterator()
+    ):
+        if (user_id, project_id) in seen:
+            duplicates.append(order_pk)
+        else:
+            seen.add((user_id, project_id))
+    for start in range(0, len(duplicates), 1000):
+        Order.objects.filter(pk__in=duplicates[start:start + 1000]).update(status='duplicate')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_project_title_upper_trgm'),
+    ]
+
+    operations = [
+        migrations.RunPython(resolve_duplicate_completed_orders, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.0.1 on 2026-10-17 02:07
+
+from django.db import migrations, models
+
+
+def backfill_transaction_keys(apps, schema_editor):
+    """Claim the payment id of every transaction logged so far"""
+    PaymentTransaction = apps.get_model('core', 'PaymentTransaction')
+    PaymentTransactionKey = apps.get_model('core', 'PaymentTransactionKey')
+    batch = []
+    for transaction_id in (
+        PaymentTransaction.objects.order_by().values_list('transaction_id', flat=True).distinct().iterator()
+    ):
+        batch.append(PaymentTransactionKey(transaction_id=transaction_id))
+        if len(batch) >= 1000:
+            PaymentTransactionKey.objects.bulk_create(batch)
+            batch = []
+    PaymentTransactionKey.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_resolve_duplicate_completed_orders'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentTransactionKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('transaction_id', models.CharField(max_length=100, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_transaction_keys, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='paymenttransaction',
+            name='transaction_id',
+            field=models.CharField(max_length=100),
+        ),
+        migrations.AddConstraint(
+            model_name='paymenttransaction',
+            constraint=models.UniqueConstraint(fields=('transaction_id', 'created_at'), name='unique_transaction_id_created_at'),
+        ),
+    ]
@@ -1,9 +1,14 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.contrib.auth.models import User
-from django.utils.text import slugify
+from django.utils import timezone
 from django.core.validators import MinValueValidator
+from django.db.models.functions import Upper
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 import uuid
 
+from .slugs import allocate_slugs
+
 
 class UserProfile(models.Model):
     """Extended user profile"""
@@ -39,6 +44,8 @@ class Project(models.Model):
     technology = models.CharField(max_length=50, choices=TECHNOLOGY_CHOICES)
     price = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(0)])
     image = models.ImageField(upload_to='projects/images/')
+    # Resized WebP/JPEG copies of image, see core.images.generate_derivatives
+    image_derivatives = models.JSONField(default=dict, blank=True, editable=False)
     demo_video_link = models.URLField(blank=True, null=True)
     project_file = models.FileField(upload_to='projects/files/')
     is_active = models.BooleanField(default=True)
@@ -46,20 +53,44 @@ class Project(models.Model):
     downloads = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Maintained by a database trigger (see migration 0006), never written by Django
+    search_vector = SearchVectorField(null=True, editable=False)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            GinIndex(fields=['search_vector'], name='project_search_vector_gin'),
+            GinIndex(fields=['title'], name='project_title_trgm', opclasses=['gin_trgm_ops']),
+            # title__icontains compiles to UPPER(title) LIKE UPPER(%s) (admin searches)
+            GinIndex(OpClass(Upper('title'), name='gin_trgm_ops'), name='project_title_upper_trgm'),
+            GinIndex(fields=['short_description'], name='project_short_desc_trgm', opclasses=['gin_trgm_ops']),
+            # Catalogue listing, home page "recent" and related projects
+            models.Index(fields=['-created_at', '-id'], name='project_active_recent',
+                         condition=models.Q(is_active=True)),
+            models.Index(fields=['technology', '-created_at', '-id'], name='project_active_tech_recent',
+                         condition=models.Q(is_active=True)),
+            # Home page "featured"
+            models.Index(fields=['-created_at'], name='project_featured_recent',
+                         condition=models.Q(is_active=True, featured=True)),
+        ]
+
+    # Attempts at a free slug before a concurrent-save IntegrityError is re-raised
+    SLUG_RETRIES = 5
 
     def save(self, *args, **kwargs):
         """Auto-generate unique slug from title"""
-        if not self.slug:
-            self.slug = slugify(self.title)
-            original_slug = self.slug
-            counter = 1
-            while Project.objects.filter(slug=self.slug).exists():
-                self.slug = f"{original_slug}-{counter}"
-                counter += 1
-        super().save(*args, **kwargs)
+        if self.slug:
+            return super().save(*args, **kwargs)
+
+        for attempt in range(self.SLUG_RETRIES):
+            self.slug = allocate_slugs(Project.objects.all(), [self.title])[0]
+            try:
+                # Savepoint, so a lost race doesn't break the caller's transaction
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                if attempt == self.SLUG_RETRIES - 1 or not Project.objects.filter(slug=self.slug).exists():
+                    raise
     
     def __str__(self):
         return self.title
@@ -72,6 +103,8 @@ class Order(models.Model):
         ('completed', 'Completed'),
         ('failed', 'Failed'),
         ('refunded', 'Refunded'),
+        # Paid for a project the user already owned; refund from the admin
+        ('duplicate', 'Duplicate (refund due)'),
     ]
     
     order_id = models.CharField(max_length=100, unique=True, blank=True)
@@ -87,6 +120,21 @@ class Order(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Dashboard purchases: user + status, newest first
+            models.Index(fields=['user', 'status', '-created_at'], name='order_user_status_recent'),
+            # verify_payment looks orders up by the gateway order id
+            models.Index(fields=['razorpay_order_id'], name='order_razorpay_order_id'),
+            # Admin changelist: default ordering, date_hierarchy and payment id search
+            models.Index(fields=['-created_at', '-id'], name='order_recent'),
+            models.Index(fields=['razorpay_payment_id'], name='order_razorpay_payment_id'),
+        ]
+        constraints = [
+            # A project can be bought once per user; also serves the
+            # (user, project, status='completed') purchase checks
+            models.UniqueConstraint(fields=['user', 'project'], condition=models.Q(status='completed'),
+                                    name='unique_completed_order_per_user_project'),
+        ]
     
     def save(self, *args, **kwargs):
         if not self.order_id:
@@ -136,8 +184,13 @@ class CustomProjectRequest(models.Model):
 
 
 class PaymentTransaction(models.Model):
-    """Payment Transaction Log"""
-    transaction_id = models.CharField(max_length=100, unique=True)
+    """Payment Transaction Log
+
+    Partitioned by month on created_at (see core.partitions), so a unique
+    index must include created_at; each transaction_id is claimed once in
+    PaymentTransactionKey before its row is written (core.payments).
+    """
+    transaction_id = models.CharField(max_length=100)
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='transactions')
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     currency = models.CharField(max_length=10, default='INR')
@@ -146,20 +199,203 @@ class PaymentTransaction(models.Model):
     razorpay_response = models.JSONField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    class Meta:
+        indexes = [
+            # Admin changelist ordering and date_hierarchy
+            models.Index(fields=['-created_at', '-id'], name='transaction_recent'),
+        ]
+        constraints = [
+            # Also serves transaction_id lookups
+            models.UniqueConstraint(fields=['transaction_id', 'created_at'], name='unique_transaction_id_created_at'),
+        ]
+    
     def __str__(self):
         return f"Transaction {self.transaction_id}"
 
 
+class PaymentTransactionKey(models.Model):
+    """Gateway payment ids already logged as a PaymentTransaction.
+
+    Not partitioned, so the unique index on transaction_id holds across
+    months and archived partitions.
+    """
+    transaction_id = models.CharField(max_length=100, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return self.transaction_id
+
+
 class Download(models.Model):
-    """Track project downloads"""
+    """Track project downloads
+
+    Partitioned by month on downloaded_at (see core.partitions).
+    """
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     project = models.ForeignKey(Project, on_delete=models.CASCADE)
     order = models.ForeignKey(Order, on_delete=models.CASCADE)
-    downloaded_at = models.DateTimeField(auto_now_add=True)
+    # Set when the download happened, not when the batched audit log wrote the row
+    downloaded_at = models.DateTimeField(default=timezone.now, editable=False)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     
     class Meta:
         ordering = ['-downloaded_at']
+        indexes = [
+            models.Index(fields=['-downloaded_at', '-id'], name='download_recent'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} downloaded {self.project.title}"
+
+
+class Entitlement(models.Model):
+    """User owns project; denormalized from completed orders by core.entitlements"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='entitlements')
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='entitlements')
+    order = models.OneToOneField(Order, on_delete=models.CASCADE, related_name='entitlement')
+    granted_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-granted_at']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'project'], name='unique_entitlement'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} owns {self.project.title}"
+
+
+class PaymentWebhookEvent(models.Model):
+    """Raw gateway webhook, stored on receipt and applied by process_payment_webhooks"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processed', 'Processed'),
+        ('duplicate', 'Duplicate'),
+        ('ignored', 'Ignored'),
+        ('failed', 'Failed'),
+    ]
+    
+    event_id = models.CharField(max_length=100, unique=True)
+    event_type = models.CharField(max_length=100)
+    payment_id = models.CharField(max_length=200, blank=True, db_index=True)
+    razorpay_order_id = models.CharField(max_length=200, blank=True)
+    payload = models.JSONField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    error = models.TextField(blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-received_at']
+        indexes = [
+            # Processor claim query: pending events, oldest first
+            models.Index(fields=['received_at'], name='webhook_pending_received',
+                         condition=models.Q(status='pending')),
+        ]
+    
+    def __str__(self):
+        return f"{self.event_type} {self.event_id}"
+
+
+class OutboundEmail(models.Model):
+    """Transactional email outbox, drained by the send_queued_emails command"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('dead', 'Dead Letter'),
+    ]
+    
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254, blank=True)
+    recipients = models.JSONField(default=list)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Worker claim query: due pending emails, oldest first
+            models.Index(fields=['next_attempt_at'], name='outbox_pending_due',
+                         condition=models.Q(status='pending')),
+        ]
+    
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.recipients)}"
+
+
+class ProjectRecommendation(models.Model):
+    """Precomputed "bought together" neighbour, written by refresh_recommendations"""
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='recommendations')
+    recommended = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='recommended_for')
+    score = models.FloatField()
+    
+    class Meta:
+        ordering = ['project', '-score']
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'recommended'], name='unique_project_recommendation'),
+        ]
+    
+    def __str__(self):
+        return f"{self.project} -> {self.recommended} ({self.score:.3f})"
+
+
+class Watermark(models.Model):
+    """Progress marker of an incremental background job: a timestamp or a last-processed row id"""
+    name = models.CharField(max_length=100, unique=True)
+    value = models.DateTimeField(null=True, blank=True)
+    position = models.BigIntegerField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.name}: {self.value if self.position is None else self.position}"
+
+
+class DailyStats(models.Model):
+    """Daily sales and download totals, recomputed per day by rollup_analytics"""
+    date = models.DateField()
+    orders_created = models.PositiveIntegerField(default=0)
+    orders_completed = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    downloads = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        abstract = True
+        ordering = ['-date']
+    
+    @property
+    def conversion(self):
+        """Share of orders created that day that completed (None without orders)"""
+        return self.orders_completed / self.orders_created if self.orders_created else None
+
+
+class DailyProjectStats(DailyStats):
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='daily_stats')
+    
+    class Meta(DailyStats.Meta):
+        # Admin entry point for the analytics page
+        verbose_name = 'analytics'
+        verbose_name_plural = 'analytics'
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'project'], name='unique_daily_project_stats'),
+        ]
+    
+    def __str__(self):
+        return f"{self.project} on {self.date}"
+
+
+class DailyTechnologyStats(DailyStats):
+    technology = models.CharField(max_length=50, choices=Project.TECHNOLOGY_CHOICES)
+    
+    class Meta(DailyStats.Meta):
+        verbose_name_plural = 'daily technology stats'
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'technology'], name='unique_daily_technology_stats'),
+        ]
+    
+    def __str__(self):
+        return f"{self.technology} on {self.date}"
@@ -0,0 +1,167 @@
+# core/pagination.py
+import json
+
+from django.core import signing
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+CURSOR_SALT = 'core.pagination.cursor'
+
+
+def encode_cursor(obj, direction):
+    """Opaque token pointing at obj's (created_at, id) position"""
+    # Untimestamped signature so a given position always has the same URL
+    return signing.Signer(salt=CURSOR_SALT).sign_object(
+        {'c': obj.created_at.isoformat(), 'i': obj.pk, 'd': direction},
+        compress=True,
+    )
+
+
+def decode_cursor(token):
+    """Return (created_at, id, direction), or None for a missing/invalid token"""
+    if not token:
+        return None
+    try:
+        data = signing.Signer(salt=CURSOR_SALT).unsign_object(token)
+        created_at = parse_datetime(data['c'])
+        if created_at is None or data['d'] not in ('next', 'prev'):
+            return None
+        return created_at, int(data['i']), data['d']
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        return None
+
+
+def _planner_estimate(queryset):
+    """Row count estimated from planner statistics, or None if there are none"""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+
+    if not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT sum(greatest(c.reltuples, 0))::bigint, max(c.reltuples) FROM pg_class c '
+                "WHERE (c.oid = %s::regclass AND c.relkind <> 'p') "
+                'OR c.oid IN (SELECT relid FROM pg_partition_tree(%s::regclass) WHERE isleaf)',
+                [queryset.model._meta.db_table] * 2,
+            )
+            row = cursor.fetchone()
+        # reltuples is -1 for tables that were never analyzed
+        if row and row[1] is not None and row[1] >= 0:
+            return row[0]
+        return None
+
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def estimate_count(queryset):
+    """Approximate row count from planner statistics instead of COUNT(*).
+
+    Unfiltered querysets read pg_class.reltuples directly (summed over the
+    partitions of a partitioned table); filtered ones use the planner's row
+    estimate. Other databases, and tables never analyzed, fall back to an
+    exact count.
+    """
+    estimate = _planner_estimate(queryset)
+    return queryset.count() if estimate is None else estimate
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that trusts estimate_count for large results.
+
+    Below exact_threshold estimated rows the count is exact, so small
+    filtered lists still show correct totals; above it, page counts are
+    approximate and trailing pages may come back short or empty.
+    """
+    exact_threshold = 10000
+
+    @cached_property
+    def count(self):
+        estimate = _planner_estimate(self.object_list)
+        if estimate is None or estimate < self.exact_threshold:
+            return super().count
+        return estimate
+
+
+class KeysetPage:
+    """A page of results from KeysetPaginator"""
+
+    def __init__(self, object_list, has_next, has_previous, estimated_count=None):
+        self.object_list = object_list
+        self.has_next_page = has_next
+        self.has_previous_page = has_previous
+        self.estimated_count = estimated_count
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.has_next_page
+
+    def has_previous(self):
+        return self.has_previous_page
+
+    def has_other_pages(self):
+        return self.has_next_page or self.has_previous_page
+
+    @property
+    def next_cursor(self):
+        if self.has_next_page and self.object_list:
+            return encode_cursor(self.object_list[-1], 'next')
+        return ''
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous_page and self.object_list:
+            return encode_cursor(self.object_list[0], 'prev')
+        return ''
+
+
+class KeysetPaginator:
+    """Cursor pagination over ('-created_at', '-id') without COUNT(*) or OFFSET.
+
+    Every page costs one indexed range scan of per_page + 1 rows, however deep
+    it is. Pass estimate_count=True to attach an approximate total to pages.
+    """
+
+    def __init__(self, queryset, per_page, estimate_count=False):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.estimate_count = estimate_count
+
+    def get_page(self, cursor):
+        """Page at an encoded cursor; missing or invalid cursors give the first page"""
+        return self.get_page_at(decode_cursor(cursor))
+
+    def get_page_at(self, position):
+        """Page at a decode_cursor() position, or the first page for None"""
+        queryset = self.queryset
+
+        if position is None:
+            rows = list(queryset.order_by('-created_at', '-id')[:self.per_page + 1])
+            has_next, has_previous = len(rows) > self.per_page, False
+            rows = rows[:self.per_page]
+        else:
+            created_at, pk, direction = position
+            if direction == 'next':
+                rows = list(queryset.filter(
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+                ).order_by('-created_at', '-id')[:self.per_page + 1])
+                has_next, has_previous = len(rows) > self.per_page, True
+                rows = rows[:self.per_page]
+            else:
+                rows = list(queryset.filter(
+                    Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+                ).order_by('created_at', 'id')[:self.per_page + 1])
+                has_next, has_previous = True, len(rows) > self.per_page
+                rows = rows[:self.per_page][::-1]
+
+        estimated = estimate_count(self.queryset) if self.estimate_count else None
+        return KeysetPage(rows, has_next, has_previous, estimated)
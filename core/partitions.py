@@ -0,0 +1,192 @@
+# core/partitions.py
+import gzip
+import logging
+import os
+import re
+from datetime import date
+from pathlib import Path
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Event tables range-partitioned by month (migration 0016): table -> partition key
+PARTITIONED_TABLES = {
+    'core_download': 'downloaded_at',
+    'core_paymenttransaction': 'created_at',
+}
+# Monthly partitions kept created ahead of the current month
+MONTHS_AHEAD = 3
+
+ARCHIVE_NAME = re.compile(r'^(?P<table>\w+)_p(?P<year>\d{4})(?P<month>\d{2})\.copy\.gz$')
+
+
+def add_months(month, n):
+    """First day of the month n months after month's"""
+    index = month.year * 12 + month.month - 1 + n
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table, month):
+    return f'{table}_p{month:%Y%m}'
+
+
+def create_partition(cursor, table, month):
+    """Create table's partition for month if it doesn't exist yet.
+
+    Bounds are UTC midnights, matching the UTC timestamps Django stores.
+    Rows of the month that already landed in the table's _default
+    partition (Postgres refuses to create the partition while they are
+    there) are moved into the new partition; returns how many.
+    """
+    name = partition_name(table, month)
+    start, end = f'{month:%Y-%m-%d} 00:00:00+00', f'{add_months(month, 1):%Y-%m-%d} 00:00:00+00'
+    cursor.execute('SELECT to_regclass(%s), to_regclass(%s)', [name, f'{table}_default'])
+    exists, default = cursor.fetchone()
+    if exists:
+        return 0
+    stray = 0
+    if default:
+        column = PARTITIONED_TABLES[table]
+        cursor.execute(f'SELECT count(*) FROM {default} WHERE {column} >= %s AND {column} < %s', [start, end])
+        stray = cursor.fetchone()[0]
+    create = f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES FROM ('{start}') TO ('{end}')"
+    if not stray:
+        cursor.execute(create)
+        return 0
+
+    logger.warning('Moving %d rows of %s from %s into the new partition', stray, f'{month:%Y-%m}', default)
+    with transaction.atomic():
+        cursor.execute(f'ALTER TABLE {table} DETACH PARTITION {default}')
+        cursor.execute(create)
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM {default} WHERE {column} >= %s AND {column} < %s RETURNING *) '
+            f'INSERT INTO {name} SELECT * FROM moved',
+            [start, end],
+        )
+        cursor.execute(f'ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT')
+    return stray
+
+
+def list_partitions(cursor, table):
+    """[(month, partition name)] of table's monthly partitions, oldest first"""
+    cursor.execute(
+        'SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+        'WHERE i.inhparent = %s::regclass',
+        [table],
+    )
+    partitions = []
+    for (name,) in cursor.fetchall():
+        match = re.fullmatch(rf'{table}_p(\d{{4}})(\d{{2}})', name)
+        if match:
+            partitions.append((date(int(match[1]), int(match[2]), 1), name))
+    return sorted(partitions)
+
+
+def ensure_partitions(months_ahead=MONTHS_AHEAD):
+    """Create every partitioned table's partitions up to months_ahead from now.
+
+    Rows outside all monthly partitions land in the table's _default
+    partition until this runs (via archive_events) and moves them into
+    their month's new partition.
+    """
+    this_month = timezone.now().date().replace(day=1)
+    with connection.cursor() as cursor:
+        for table in PARTITIONED_TABLES:
+            for n in range(months_ahead + 1):
+                create_partition(cursor, table, add_months(this_month, n))
+
+
+def _copy_out(cursor, sql, f):
+    raw = cursor.cursor
+    if hasattr(raw, 'copy_expert'):  # psycopg2
+        raw.copy_expert(sql, f)
+    else:  # psycopg 3
+        with raw.copy(sql) as copy:
+            for data in copy:
+                f.write(data)
+
+
+def _copy_in(cursor, sql, f):
+    raw = cursor.cursor
+    if hasattr(raw, 'copy_expert'):
+        raw.copy_expert(sql, f)
+    else:
+        with raw.copy(sql) as copy:
+            while data := f.read(1 << 16):
+                copy.write(data)
+
+
+def archive_partition(table, name, directory):
+    """Dump one partition to directory as gzipped COPY text, then drop it.
+
+    The file is written and fsynced before the partition is detached, so
+    an interrupted run leaves the rows in the database. Returns (path,
+    rows archived).
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f'{name}.copy.gz'
+    if path.exists():
+        raise FileExistsError(f'{path} already exists; restore or move it before archiving {name} again')
+    partial = path.with_name(path.name + '.partial')
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT count(*) FROM {name}')
+        rows = cursor.fetchone()[0]
+        with open(partial, 'wb') as raw_file:
+            with gzip.GzipFile(fileobj=raw_file, mode='wb', compresslevel=6) as f:
+                _copy_out(cursor, f'COPY {name} TO STDOUT', f)
+            raw_file.flush()
+            os.fsync(raw_file.fileno())
+        os.replace(partial, path)
+        with transaction.atomic():
+            cursor.execute(f'ALTER TABLE {table} DETACH PARTITION {name}')
+            cursor.execute(f'DROP TABLE {name}')
+    return path, rows
+
+
+def archive_before(cutoff, directory, dry_run=False):
+    """Archive every monthly partition older than cutoff's month.
+
+    Yields (table, month, partition name, path, rows); in dry_run mode
+    nothing is written and path and rows are None.
+    """
+    cutoff = cutoff.replace(day=1)
+    with connection.cursor() as cursor:
+        candidates = [
+            (table, month, name)
+            for table in PARTITIONED_TABLES
+            for month, name in list_partitions(cursor, table)
+            if month < cutoff
+        ]
+    for table, month, name in candidates:
+        if dry_run:
+            yield table, month, name, None, None
+        else:
+            yield (table, month, name) + archive_partition(table, name, directory)
+
+
+def restore_partition(path):
+    """Recreate the partition archived in path and load its rows; returns (partition name, rows)
+
+    The file is renamed to *.restored afterwards, so the partition can be
+    archived again by a later archive_events run.
+    """
+    match = ARCHIVE_NAME.match(Path(path).name)
+    if not match or match['table'] not in PARTITIONED_TABLES:
+        raise ValueError(f'{path} is not an archive_events file')
+    table = match['table']
+    month = date(int(match['year']), int(match['month']), 1)
+    name = partition_name(table, month)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute('SELECT to_regclass(%s)', [name])
+        if cursor.fetchone()[0] is not None:
+            raise ValueError(f'Partition {name} already exists')
+        create_partition(cursor, table, month)
+        with gzip.open(path, 'rb') as f:
+            _copy_in(cursor, f'COPY {name} FROM STDIN', f)
+        cursor.execute(f'SELECT count(*) FROM {name}')
+        rows = cursor.fetchone()[0]
+    os.replace(path, f'{path}.restored')
+    return name, rows
@@ -0,0 +1,93 @@
+# core/payments.py
+import logging
+
+from django.db import IntegrityError, transaction
+
+from .counters import increment_downloads
+from .emails import queue_purchase_confirmation_email
+from .models import Order, PaymentTransaction, PaymentTransactionKey
+
+logger = logging.getLogger(__name__)
+
+
+def log_transaction(order, payment_id, status, response=None, payment_method=''):
+    """Write the PaymentTransaction for payment_id unless one was already logged; returns True if written
+
+    The claim in PaymentTransactionKey is unique across all partitions, so
+    a payment reported twice (browser callback and webhook, or a replayed
+    webhook) is logged once even without the order row lock.
+    """
+    _, created = PaymentTransactionKey.objects.get_or_create(transaction_id=payment_id)
+    if created:
+        PaymentTransaction.objects.create(
+            transaction_id=payment_id,
+            order=order,
+            amount=order.amount,
+            status=status,
+            payment_method=payment_method,
+            razorpay_response=response,
+        )
+    return created
+
+
+def complete_order(razorpay_order_id, payment_id, signature='', response=None, payment_method=''):
+    """Mark the order for razorpay_order_id as paid.
+
+    Idempotent: the browser callback and the webhook may both report the
+    same payment, and only the first one takes effect. A payment for a
+    project the user already owns (e.g. two pending orders, both paid) is
+    still recorded, but its order is marked 'duplicate' for refund instead
+    of completed. Returns (order, completed_now). Raises Order.DoesNotExist
+    for unknown orders.
+    """
+    with transaction.atomic():
+        order = Order.objects.select_for_update(of=('self',)).select_related('project', 'user').get(
+            razorpay_order_id=razorpay_order_id
+        )
+        if order.status in ('completed', 'duplicate'):
+            return order, False
+
+        order.razorpay_payment_id = payment_id
+        if signature:
+            order.razorpay_signature = signature
+        already_owned = Order.objects.filter(
+            user_id=order.user_id, project_id=order.project_id, status='completed',
+        ).exclude(pk=order.pk).exists()
+        if not already_owned:
+            order.status = 'completed'
+            try:
+                # A concurrent payment for another order of the same project
+                # may commit first; the partial unique index then rejects this one
+                with transaction.atomic():
+                    order.save()
+            except IntegrityError:
+                already_owned = True
+        if already_owned:
+            order.status = 'duplicate'
+            order.save()
+            logger.warning('Order %s paid for an already owned project; marked for refund', order.order_id)
+
+        # Create transaction log
+        log_transaction(order, payment_id, 'success', response, payment_method)
+
+        if already_owned:
+            return order, False
+
+        # Queue confirmation email (sent by send_queued_emails)
+        queue_purchase_confirmation_email(order)
+
+        # Update project downloads count (buffered, flushed in batches); only
+        # once the payment commits, which may be at the end of a webhook batch
+        transaction.on_commit(lambda: increment_downloads(order.project_id))
+    return order, True
+
+
+def fail_order(razorpay_order_id, payment_id, response=None, payment_method=''):
+    """Record a failed payment; completed orders are left untouched"""
+    with transaction.atomic():
+        order = Order.objects.select_for_update().get(razorpay_order_id=razorpay_order_id)
+        log_transaction(order, payment_id, 'failed', response, payment_method)
+        if order.status == 'pending':
+            order.status = 'failed'
+            order.save(update_fields=['status', 'updated_at'])
+    return order
@@ -0,0 +1,105 @@
+# core/recommendations.py
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Order, Project, ProjectRecommendation, Watermark
+
+WATERMARK_NAME = 'recommendations'
+# Orders committed while a refresh runs can carry an earlier updated_at, so
+# each run re-reads this much history; refreshing a project twice is harmless
+WATERMARK_OVERLAP = timedelta(minutes=5)
+# Projects whose similarity rows are computed per sparse product
+BLOCK_SIZE = 1000
+
+
+def related_projects(project, limit=4):
+    """Co-purchased projects, topped up with same-technology ones for cold items"""
+    related = list(
+        Project.objects.filter(recommended_for__project=project, is_active=True)
+        .order_by('-recommended_for__score')[:limit]
+    )
+    if len(related) < limit:
+        related += Project.objects.filter(technology=project.technology, is_active=True).exclude(
+            id__in=[project.id] + [p.id for p in related]
+        )[:limit - len(related)]
+    return related
+
+
+def refresh_recommendations(full=False, top_n=None):
+    """Recompute top-N co-purchase neighbours; returns the number of projects refreshed.
+
+    Similarity is the cosine between projects' buyer sets:
+    |buyers(a) & buyers(b)| / sqrt(|buyers(a)| * |buyers(b)|), computed as a
+    sparse user x project matrix product. An incremental run only
+    recomputes projects bought by users whose orders changed since the last
+    run, using only the orders of users who bought those projects.
+    """
+    import numpy as np
+    from scipy import sparse
+
+    top_n = top_n or settings.RECOMMENDATIONS_PER_PROJECT
+    started = timezone.now()
+    watermark = None if full else Watermark.objects.filter(name=WATERMARK_NAME).first()
+    completed = Order.objects.filter(status='completed').order_by()
+
+    if watermark is None:
+        affected = None
+        pairs = completed.values_list('user_id', 'project_id')
+    else:
+        changed = Order.objects.filter(updated_at__gt=watermark.value).order_by()
+        affected = set(changed.values_list('project_id', flat=True))
+        affected |= set(completed.filter(user_id__in=changed.values('user_id')).values_list('project_id', flat=True))
+        pairs = completed.filter(
+            user_id__in=completed.filter(project_id__in=affected).values('user_id')
+        ).values_list('user_id', 'project_id')
+
+    pairs = np.array(list(pairs), dtype=np.int64).reshape(-1, 2)
+    users, user_index = np.unique(pairs[:, 0], return_inverse=True)
+    items, item_index = np.unique(pairs[:, 1], return_inverse=True)
+    buyers = sparse.csr_matrix(
+        (np.ones(len(pairs), dtype=np.float64), (user_index, item_index)), shape=(len(users), len(items))
+    )
+    buyers.data[:] = 1  # Repeat purchases count once
+
+    # Buyer counts over all orders, not just the loaded users, for the cosine norm
+    counted = completed if affected is None else completed.filter(project_id__in=items.tolist())
+    popularity = dict(
+        counted.values('project_id').annotate(n=Count('user_id', distinct=True)).values_list('project_id', 'n')
+    )
+    inverse_norm = 1 / np.sqrt(np.array([popularity[p] for p in items.tolist()], dtype=np.float64))
+
+    rows = items if affected is None else items[np.isin(items, list(affected))]
+    recommendations = []
+    for start in range(0, len(rows), BLOCK_SIZE):
+        block = np.searchsorted(items, rows[start:start + BLOCK_SIZE])
+        co_purchases = (buyers[:, block].T @ buyers).tocsr()
+        similarity = (
+            sparse.diags(inverse_norm[block]) @ co_purchases @ sparse.diags(inverse_norm)
+        ).tocsr()
+        for offset, position in enumerate(block):
+            first, last = similarity.indptr[offset], similarity.indptr[offset + 1]
+            columns, scores = similarity.indices[first:last], similarity.data[first:last]
+            keep = columns != position
+            columns, scores = columns[keep], scores[keep]
+            if len(scores) > top_n:
+                best = np.argpartition(-scores, top_n)[:top_n]
+                columns, scores = columns[best], scores[best]
+            recommendations += [
+                ProjectRecommendation(project_id=int(items[position]), recommended_id=int(items[c]), score=float(s))
+                for c, s in zip(columns, scores)
+            ]
+
+    with transaction.atomic():
+        stale = ProjectRecommendation.objects.all()
+        if affected is not None:
+            stale = stale.filter(project_id__in=affected)
+        stale.delete()
+        ProjectRecommendation.objects.bulk_create(recommendations, batch_size=1000)
+        Watermark.objects.update_or_create(
+            name=WATERMARK_NAME, defaults={'value': started - WATERMARK_OVERLAP},
+        )
+    return len(items) if affected is None else len(affected)
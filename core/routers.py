@@ -0,0 +1,119 @@
+# core/routers.py
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PRIMARY = DEFAULT_DB_ALIAS
+# Set on responses to a request that wrote; its browser reads from the
+# primary until the cookie expires (REPLICA_PIN_SECONDS)
+PIN_COOKIE = 'pin_primary'
+# Read and written on the primary without pinning the browser: every login,
+# logout and session touch writes these, and pinning on them would send
+# nearly every signed-in browser to the primary
+BOOKKEEPING_MODELS = {'sessions.session'}
+
+
+class _RequestRouting:
+    def __init__(self, replica):
+        self.replica = replica
+        self.wrote = False
+        self.bookkeeping = False
+
+
+_routing = ContextVar('db_routing', default=None)
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias != PRIMARY]
+
+
+@contextmanager
+def primary_reads():
+    """Read from the primary inside this block, e.g. to fill a cache after an invalidating write"""
+    state = _routing.get()
+    if state is None:
+        yield
+        return
+    replica, state.replica = state.replica, None
+    try:
+        yield
+    finally:
+        state.replica = replica
+
+
+@contextmanager
+def bookkeeping_writes():
+    """Don't pin the browser for writes in this block, e.g. the last_login update of login()"""
+    state = _routing.get()
+    if state is None:
+        yield
+        return
+    bookkeeping, state.bookkeeping = state.bookkeeping, True
+    try:
+        yield
+    finally:
+        state.bookkeeping = bookkeeping
+
+
+class PrimaryReplicaRouter:
+    """Send reads of GET requests to a replica, everything else to the primary.
+
+    Only requests wrapped by ReplicaRoutingMiddleware use replicas; management
+    commands, worker threads and writes (including select_for_update and
+    get_or_create) always use the primary. Once a request writes, its
+    remaining reads, and those of the same browser for the next
+    REPLICA_PIN_SECONDS, go to the primary too, so a user sees their own
+    purchase on the dashboard immediately.
+
+    Sessions (BOOKKEEPING_MODELS) are always read from the primary and
+    writes to them, or inside bookkeeping_writes(), don't pin.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        if state is None or state.replica is None or state.wrote or connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+        if model._meta.label_lower in BOOKKEEPING_MODELS:
+            return PRIMARY
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _routing.get()
+        if state is not None and not state.bookkeeping and model._meta.label_lower not in BOOKKEEPING_MODELS:
+            state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
+
+
+class ReplicaRoutingMiddleware:
+    """Pick one replica per safe, unpinned request and pin the browser after a write"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        replicas = replica_aliases()
+        replica = None
+        if replicas and request.method in ('GET', 'HEAD', 'OPTIONS') and PIN_COOKIE not in request.COOKIES:
+            replica = random.choice(replicas)
+        state = _RequestRouting(replica)
+        token = _routing.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing.reset(token)
+        if state.wrote and replicas:
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS,
+                secure=request.is_secure(), httponly=True, samesite='Lax',
+            )
+        return response
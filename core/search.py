@@ -0,0 +1,29 @@
+# core/search.py
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+
+
+def search_projects(queryset, query):
+    """Filter projects by full-text search, ordered by relevance.
+
+    Falls back to trigram similarity on title and short description when the
+    full-text search finds nothing (typos, partial words).
+    """
+    search_query = SearchQuery(query, config='english', search_type='websearch')
+    ranked = queryset.filter(search_vector=search_query).annotate(
+        rank=SearchRank(F('search_vector'), search_query)
+    ).order_by('-rank', '-created_at', '-id')
+
+    if ranked.exists():
+        return ranked
+
+    # The % operator (trigram_similar) can use the gin_trgm_ops indexes
+    return queryset.filter(
+        Q(title__trigram_similar=query) | Q(short_description__trigram_similar=query)
+    ).annotate(
+        similarity=Greatest(
+            TrigramSimilarity('title', query),
+            TrigramSimilarity('short_description', query),
+        )
+    ).order_by('-similarity', '-created_at', '-id')
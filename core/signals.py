@@ -0,0 +1,45 @@
+# core/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import bump_catalogue_version
+from .dashboard import invalidate_user_stats
+from .entitlements import invalidate_user_library, sync_entitlement
+from .images import update_project_derivatives
+from .models import Order, Project
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def invalidate_catalogue_cache(sender, **kwargs):
+    """Any project change (admin form, list_editable, delete) bumps the catalogue version"""
+    bump_catalogue_version()
+
+
+@receiver(post_save, sender=Project)
+def generate_image_derivatives(sender, instance, **kwargs):
+    """Build responsive image sizes when a project's image is uploaded or replaced"""
+    update_project_derivatives(instance)
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+def invalidate_dashboard_stats(sender, instance, **kwargs):
+    """Payments, refunds and admin edits change the buyer's dashboard totals"""
+    # After commit, so a concurrent dashboard view can't re-cache the old totals
+    transaction.on_commit(lambda: invalidate_user_stats(instance.user_id))
+
+
+@receiver(post_save, sender=Order)
+def update_entitlement(sender, instance, created, **kwargs):
+    """Completed orders grant ownership; refunds and other status changes revoke it"""
+    if created and instance.status == 'pending':
+        return
+    sync_entitlement(instance)
+
+
+@receiver(post_delete, sender=Order)
+def invalidate_library(sender, instance, **kwargs):
+    # The entitlement itself goes with the order (on_delete=CASCADE)
+    transaction.on_commit(lambda: invalidate_user_library(instance.user_id))
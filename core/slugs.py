@@ -0,0 +1,51 @@
+# core/slugs.py
+import re
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+from django.utils.text import slugify
+
+
+def allocate_slugs(queryset, titles, field='slug'):
+    """Return a unique slug for each title, in order, using a single query.
+
+    Slugs follow the existing scheme: `title`, then `title-1`, `title-2`...
+    taking the first free suffix. Existing slugs are looked up by prefix
+    (served by the slug column's LIKE index), and titles in the same batch
+    never get the same slug. The result can still race with a concurrent
+    writer, so callers retry on IntegrityError.
+    """
+    bases = [slugify(title) or 'project' for title in titles]
+    unique_bases = set(bases)
+    if not unique_bases:
+        return []
+
+    # Plain equality/prefix lookups keep this an index scan even for large
+    # batches; slugs that only share the prefix are filtered out below
+    lookups = reduce(or_, (
+        Q(**{field: base}) | Q(**{f'{field}__startswith': f'{base}-'}) for base in unique_bases
+    ))
+    pattern = re.compile(rf'^(?:{"|".join(map(re.escape, unique_bases))})(?:-[0-9]+)?$')
+    taken = {
+        slug for slug in queryset.filter(lookups).order_by().values_list(field, flat=True).iterator()
+        if pattern.match(slug)
+    }
+
+    slugs = []
+    for base in bases:
+        slug, counter = base, 1
+        while slug in taken:
+            slug = f'{base}-{counter}'
+            counter += 1
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
+def assign_slugs(queryset, objs, field='slug'):
+    """Fill in the slug of every obj that doesn't have one, e.g. before bulk_create"""
+    pending = [obj for obj in objs if not getattr(obj, field)]
+    for obj, slug in zip(pending, allocate_slugs(queryset, [obj.title for obj in pending], field)):
+        setattr(obj, field, slug)
+    return objs
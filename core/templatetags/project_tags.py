@@ -0,0 +1,73 @@
+# core/templatetags/project_tags.py
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+
+def _card_key(project, show_stats, owned):
+    """Cards are cached per project revision and image; the stats variant also tracks downloads"""
+    variant = f'stats-{project.downloads}' if show_stats else 'plain'
+    if owned:
+        variant += '-owned'
+    image = project.image_derivatives.get('hash', '')
+    return f'project_card:{project.id}:{project.updated_at.timestamp()}:{image}:{variant}'
+
+
+@register.simple_tag
+def project_cards(projects, show_stats=False, owned=None):
+    """Render a grid's worth of project cards with a single cache lookup.
+
+    owned is the viewer's UserLibrary (or any container of project ids);
+    owned projects get the "Owned" badge.
+    """
+    projects = list(projects)
+    flags = [owned is not None and project.id in owned for project in projects]
+    keys = [_card_key(project, show_stats, flag) for project, flag in zip(projects, flags)]
+    cached = cache.get_many(keys)
+
+    missing = {}
+    cards = []
+    for key, project, flag in zip(keys, projects, flags):
+        card = cached.get(key)
+        if card is None:
+            card = render_to_string('projects/project_card.html', {
+                'project': project,
+                'show_stats': show_stats,
+                'owned': flag,
+            })
+            missing[key] = card
+        cards.append(card)
+
+    if missing:
+        cache.set_many(missing, settings.PROJECT_CARD_CACHE_TIMEOUT)
+    return mark_safe(''.join(cards))
+
+
+def _srcset(entries):
+    return ', '.join(f'{default_storage.url(name)} {width}w' for width, name in entries)
+
+
+@register.inclusion_tag('projects/project_picture.html')
+def project_picture(project, sizes='100vw', loading='lazy'):
+    """<picture> for project.image with WebP and JPEG srcsets at every derivative width.
+
+    Falls back to the original upload until derivatives have been generated
+    for the current image; a manifest left over from a replaced image is ignored.
+    """
+    derivatives = project.image_derivatives
+    if not project.image or derivatives.get('source') != project.image.name:
+        derivatives = {}
+    jpeg = derivatives.get('jpeg') or []
+    return {
+        'project': project,
+        'sizes': sizes,
+        'loading': loading,
+        'webp_srcset': _srcset(derivatives.get('webp') or []),
+        'jpeg_srcset': _srcset(jpeg),
+        'src': default_storage.url(jpeg[-1][1]) if jpeg else (project.image.url if project.image else ''),
+    }
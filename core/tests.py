@@ -0,0 +1,935 @@
+import hashlib
+import hmac
+import fcntl
+import importlib
+import io
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import mock
+
+from PIL import Image
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, connection, connections, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.template import Context, Template
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.analytics import _on_days, rollup_analytics
+from core.audit import DownloadLog
+from core.cache import cached_catalogue_query
+from core.dashboard import get_user_stats
+from core.counters import CounterBuffer, flush_counters
+from core.delivery import serve_file
+from core.images import generate_derivatives
+from core.importer import ProjectImporter
+from core.emails import queue_email, send_queued_emails
+from core.exports import iter_export
+from core.pagination import decode_cursor, encode_cursor
+from core.partitions import add_months, create_partition, partition_name
+from core.payments import complete_order, fail_order
+from core.routers import PIN_COOKIE, PRIMARY, ReplicaRoutingMiddleware
+from core.search import search_projects
+from core.models import DailyProjectStats, Download, Order, OutboundEmail, PaymentTransaction, Project
+
+
+# The manifest storage needs collectstatic; tests render admin pages without it
+TEST_STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+
+def _seq_scans(plan):
+    """Relations read by a sequential scan anywhere in an EXPLAIN (FORMAT JSON) plan node"""
+    scans = [plan['Relation Name']] if plan['Node Type'] == 'Seq Scan' else []
+    for child in plan.get('Plans', []):
+        scans += _seq_scans(child)
+    return scans
+
+
+def _indexes(plan):
+    """Indexes used anywhere in an EXPLAIN (FORMAT JSON) plan node"""
+    indexes = [plan['Index Name']] if 'Index Name' in plan else []
+    for child in plan.get('Plans', []):
+        indexes += _indexes(child)
+    return indexes
+
+
+class QueryPlanTests(TestCase):
+    """The hot catalogue, purchase and download queries are served by indexes on a large table"""
+
+    projects = 5000
+
+    @classmethod
+    def setUpTestData(cls):
+        technologies = [choice for choice, _ in Project.TECHNOLOGY_CHOICES]
+        cls.buyers = [User.objects.create_user(f'planbuyer{n}') for n in range(50)]
+        Project.objects.bulk_create([
+            Project(
+                title=f'Plan Project {n}' + (' Ledger' if n % 1000 == 1 else ''), slug=f'plan-project-{n}',
+                short_description='Short',
+                long_description='Long', technology=technologies[n % len(technologies)],
+                price=Decimal('499.00'), is_active=n % 10 != 0, featured=n % 100 == 0,
+            )
+            for n in range(cls.projects)
+        ], batch_size=1000)
+        projects = list(Project.objects.filter(slug__startswith='plan-project-').order_by('pk'))
+        cls.project = projects[0]
+        orders = Order.objects.bulk_create([
+            Order(
+                order_id=f'ORD-PLAN{n}', user=cls.buyers[n % len(cls.buyers)], project=project,
+                amount=project.price, status='completed' if n % 3 else 'pending',
+                razorpay_order_id=f'order_plan_{n}',
+            )
+            for n, project in enumerate(projects)
+        ], batch_size=1000)
+        Download.objects.bulk_create([
+            Download(user_id=order.user_id, project_id=order.project_id, order=order) for order in orders
+        ], batch_size=1000)
+        with connection.cursor() as cursor:
+            for model in (Project, Order, Download):
+                cursor.execute(f'ANALYZE {model._meta.db_table}')
+            # Rows bulk-inserted this transaction still sit in the GIN pending
+            # list, which makes the index look expensive; autovacuum merges it
+            cursor.execute("SELECT gin_clean_pending_list('project_search_vector_gin')")
+
+    def assertNoSeqScan(self, queryset):
+        plan = json.loads(queryset.explain(format='json'))[0]['Plan']
+        self.assertEqual(_seq_scans(plan), [], json.dumps(plan, indent=1))
+
+    def test_catalogue_listing(self):
+        self.assertNoSeqScan(Project.objects.filter(is_active=True).order_by('-created_at', '-id')[:12])
+
+    def test_search_uses_full_text_index(self):
+        queryset = search_projects(Project.objects.filter(is_active=True), 'ledger')[:12]
+        self.assertEqual(len(queryset), 5)
+        plan = json.loads(queryset.explain(format='json'))[0]['Plan']
+        self.assertEqual(_seq_scans(plan), [], json.dumps(plan, indent=1))
+        self.assertIn('project_search_vector_gin', _indexes(plan))
+
+    def test_catalogue_technology_filter(self):
+        self.assertNoSeqScan(
+            Project.objects.filter(is_active=True, technology='Python').order_by('-created_at', '-id')[:12]
+        )
+
+    def test_featured_projects(self):
+        self.assertNoSeqScan(Project.objects.filter(is_active=True, featured=True).order_by('-created_at')[:6])
+
+    def test_purchase_check(self):
+        self.assertNoSeqScan(
+            Order.objects.filter(user=self.buyers[0], project=self.project, status='completed')
+        )
+
+    def test_dashboard_purchases(self):
+        self.assertNoSeqScan(
+            Order.objects.filter(user=self.buyers[0], status='completed').order_by('-created_at')[:10]
+        )
+
+    def test_verify_payment_lookup(self):
+        self.assertNoSeqScan(Order.objects.filter(razorpay_order_id='order_plan_7'))
+
+    def test_recent_downloads(self):
+        self.assertNoSeqScan(Download.objects.order_by('-downloaded_at', '-id')[:50])
+
+
+@override_settings(STORAGES=TEST_STORAGES)
+class AdminChangelistQueryBudgetTests(TestCase):
+    """Order/PaymentTransaction/Download changelists run a fixed number of queries.
+
+    A related field missing from list_select_related, or a search that
+    falls back to an OR across joins, shows up here as extra queries.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        buyers = [User.objects.create_user(f'buyer{n}', password='password') for n in range(3)]
+        projects = [
+            Project.objects.create(
+                title=f'Budget Project {n}', short_description='Short', long_description='Long',
+                technology='Python', price=Decimal('499.00'),
+            )
+            for n in range(4)
+        ]
+        for buyer in buyers:
+            for project in projects:
+                order = Order.objects.create(
+                    user=buyer, project=project, amount=project.price, status='completed',
+                    razorpay_order_id=f'order_{buyer.pk}_{project.pk}',
+                )
+                PaymentTransaction.objects.create(
+                    order=order, transaction_id=f'pay_{order.pk}', amount=order.amount, status='success',
+                )
+                Download.objects.create(user=buyer, project=project, order=order)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def assertChangelistQueries(self, model_name, num, **params):
+        url = reverse(f'admin:core_{model_name}_changelist')
+        with self.assertNumQueries(num):
+            response = self.client.get(url, params, secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(len(response.context['cl'].result_list), 0)
+
+    def test_order_changelist(self):
+        self.assertChangelistQueries('order', 7)
+
+    def test_order_changelist_search(self):
+        self.assertChangelistQueries('order', 7, q='Budget Project 1')
+
+    def test_paymenttransaction_changelist(self):
+        self.assertChangelistQueries('paymenttransaction', 8)
+
+    def test_download_changelist(self):
+        self.assertChangelistQueries('download', 7)
+
+    def test_download_changelist_search(self):
+        self.assertChangelistQueries('download', 7, q='buyer1')
+
+
+class ProjectCardCacheTests(TestCase):
+    """A grid of cards is one cache lookup, and only changed projects are rendered again"""
+
+    grid = Template('{% load project_tags %}{% project_cards projects show_stats=True %}')
+
+    @classmethod
+    def setUpTestData(cls):
+        for n in range(12):
+            Project.objects.create(
+                title=f'Card Project {n}', short_description='Short', long_description='Long',
+                technology='Python', price=Decimal('499.00'),
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def render(self):
+        projects = Project.objects.filter(title__startswith='Card Project').order_by('pk')
+        with mock.patch.object(cache, 'get_many', wraps=cache.get_many) as get_many, \
+                self.assertTemplateUsed('projects/project_card.html') as rendered:
+            html = self.grid.render(Context({'projects': projects}))
+        self.assertEqual(get_many.call_count, 1)
+        return html, [template.name for template in rendered.rendered_templates].count('projects/project_card.html')
+
+    def test_second_render_hits_cache(self):
+        cold, cold_renders = self.render()
+        self.assertEqual(cold_renders, 12)
+        with self.assertTemplateNotUsed('projects/project_card.html'):
+            warm = self.grid.render(Context({
+                'projects': Project.objects.filter(title__startswith='Card Project').order_by('pk'),
+            }))
+        self.assertEqual(warm, cold)
+
+    def test_changed_project_is_rendered_again(self):
+        self.render()
+        project = Project.objects.filter(title__startswith='Card Project').order_by('pk').first()
+        project.title = 'Card Project renamed'
+        project.save()
+        html, renders = self.render()
+        self.assertEqual(renders, 1)
+        self.assertIn('Card Project renamed', html)
+
+
+class CounterBufferConcurrencyTests(TransactionTestCase):
+    """Increments from many threads and several buffers (one per worker process in production) all land"""
+
+    buffers = 3
+    threads_per_buffer = 4
+    increments = 200
+
+    def test_concurrent_increments_and_flushes(self):
+        project = Project.objects.create(
+            title='Counted Project', short_description='Short', long_description='Long',
+            technology='Python', price=Decimal('499.00'), downloads=5,
+        )
+        other = Project.objects.create(
+            title='Other Project', short_description='Short', long_description='Long',
+            technology='Python', price=Decimal('499.00'),
+        )
+        # A long interval keeps the background flusher asleep; the workers
+        # flush themselves, so flushes race with increments and each other
+        buffers = [CounterBuffer(Project, 'downloads', interval=3600) for _ in range(self.buffers)]
+        workers = len(buffers) * self.threads_per_buffer
+        barrier = threading.Barrier(workers)
+        errors = []
+
+        def work(buffer):
+            try:
+                barrier.wait()
+                for n in range(self.increments):
+                    buffer.increment(project.pk)
+                    if n % 2:
+                        buffer.increment(other.pk, 2)
+                    if n % 20 == 0:
+                        buffer.flush()
+                buffer.flush()
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=work, args=(buffer,))
+            for buffer in buffers for _ in range(self.threads_per_buffer)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        project.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(project.downloads, 5 + workers * self.increments)
+        self.assertEqual(other.downloads, workers * self.increments)
+
+
+class ConcurrentPaymentTests(TransactionTestCase):
+    """Payments completing at once each count once, and a second paid order of an owned project doesn't count"""
+
+    buyers = 40
+    double_buyers = 5
+
+    def test_concurrent_completions(self):
+        project = Project.objects.create(
+            title='Popular Project', short_description='Short', long_description='Long',
+            technology='Python', price=Decimal('499.00'),
+        )
+        orders = []
+        for n in range(self.buyers + self.double_buyers):
+            buyer = User.objects.create_user(f'concurrentbuyer{n}')
+            # The last buyers had two pending orders and paid both
+            for copy in range(2 if n >= self.buyers else 1):
+                orders.append(Order.objects.create(
+                    user=buyer, project=project, amount=project.price,
+                    razorpay_order_id=f'order_concurrent_{n}_{copy}',
+                ))
+        barrier = threading.Barrier(len(orders))
+        errors = []
+
+        def pay(order):
+            try:
+                barrier.wait()
+                complete_order(order.razorpay_order_id, f'pay_{order.razorpay_order_id}')
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=pay, args=(order,)) for order in orders]
+        with self.assertLogs('core.payments', 'WARNING') as logs:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        flush_counters()
+
+        self.assertEqual(errors, [])
+        owners = self.buyers + self.double_buyers
+        project.refresh_from_db()
+        self.assertEqual(project.downloads, owners)
+        self.assertEqual(Order.objects.filter(project=project, status='completed').count(), owners)
+        self.assertEqual(Order.objects.filter(project=project, status='duplicate').count(), self.double_buyers)
+        self.assertEqual(PaymentTransaction.objects.filter(order__project=project).count(), len(orders))
+        self.assertEqual(len(logs.records), self.double_buyers)
+
+
+class PaymentTransactionLogTests(TestCase):
+    """A payment id is logged once, however often and however it is reported"""
+
+    def test_payment_reported_twice_is_logged_once(self):
+        buyer = User.objects.create_user('logbuyer')
+        project = Project.objects.create(
+            title='Logged Project', short_description='Short', long_description='Long',
+            technology='Python', price=Decimal('499.00'),
+        )
+        Order.objects.create(user=buyer, project=project, amount=project.price, razorpay_order_id='order_log')
+        complete_order('order_log', 'pay_log')
+        complete_order('order_log', 'pay_log')
+        fail_order('order_log', 'pay_log')
+        self.assertEqual(PaymentTransaction.objects.filter(transaction_id='pay_log').count(), 1)
+        self.assertEqual(Order.objects.get(razorpay_order_id='order_log').status, 'completed')
+
+
+@override_settings(RAZORPAY_KEY_SECRET='test_secret', DEFAULT_FROM_EMAIL='shop@example.com')
+class EmailOutboxTests(TestCase):
+    """Requests only write to the outbox; the worker sends batches over one connection"""
+
+    def test_verify_payment_queues_confirmation(self):
+        buyer = User.objects.create_user('mailbuyer', 'mailbuyer@example.com')
+        project = Project.objects.create(
+            title='Mailed Project', short_description='Short', long_description='Long',
+            technology='Python', price=Decimal('499.00'),
+        )
+        Order.objects.create(user=buyer, project=project, amount=project.price, razorpay_order_id='order_mail')
+        signature = hmac.new(b'test_secret', b'order_mail|pay_mail', hashlib.sha256).hexdigest()
+        response = self.client.post(reverse('core:verify_payment'), json.dumps({
+            'razorpay_order_id': 'order_mail', 'razorpay_payment_id': 'pay_mail', 'razorpay_signature': signature,
+        }), content_type='application/json')
+        self.assertEqual(response.json()['status'], 'success')
+        self.assertEqual(mail.outbox, [])
+        email = OutboundEmail.objects.get()
+        self.assertEqual((email.status, email.recipients), ('pending', ['mailbuyer@example.com']))
+
+    def test_worker_sends_batch_over_one_connection(self):
+        for n in range(3):
+            queue_email(f'Subject {n}', 'Body', [f'user{n}@example.com'])
+        with mock.patch('core.emails.get_connection', wraps=mail.get_connection) as get_connection:
+            self.assertEqual(send_queued_emails(), (3, 0))
+        self.assertEqual(get_connection.call_count, 1)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertFalse(OutboundEmail.objects.exclude(status='sent').exists())
+
+    @override_settings(EMAIL_OUTBOX_MAX_ATTEMPTS=2)
+    def test_failing_email_is_retried_then_dead_lettered(self):
+        email = queue_email('Subject', 'Body', ['user@example.com'])
+        with mock.patch('core.emails.EmailMessage.send', side_effect=OSError('mailbox unavailable')):
+            self.assertEqual(send_queued_emails(), (0, 1))
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.attempts), ('pending', 1))
+            self.assertGreater(email.next_attempt_at, timezone.now())
+            # Not due yet
+            self.assertEqual(send_queued_emails(), (0, 0))
+            OutboundEmail.objects.update(next_attempt_at=timezone.now())
+            with self.assertLogs('core.emails', 'ERROR'):
+                self.assertEqual(send_queued_emails(), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.last_error), ('dead', 'mailbox unavailable'))
+
+
+class FileDeliveryTests(SimpleTestCase):
+    """The front-end server backends hand the transfer off without the worker reading the file"""
+
+    name = 'projects/files/big archive.zip'
+
+    def serve(self, backend):
+        storage = mock.Mock()
+        storage.path.return_value = f'/srv/media/{self.name}'
+        storage.open.return_value = io.BytesIO(b'project archive')
+        with override_settings(DOWNLOAD_DELIVERY_BACKEND=backend):
+            return serve_file(self.name, storage), storage
+
+    def test_nginx(self):
+        response, storage = self.serve('nginx')
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/projects/files/big%20archive.zip')
+        self.assertEqual(response.content, b'')
+        self.assertIn('attachment; filename="big archive.zip"', response['Content-Disposition'])
+        storage.open.assert_not_called()
+
+    def test_apache(self):
+        response, storage = self.serve('apache')
+        self.assertEqual(response['X-Sendfile'], f'/srv/media/{self.name}')
+        self.assertEqual(response.content, b'')
+        storage.open.assert_not_called()
+
+    def test_python_streams_the_file(self):
+        response, storage = self.serve('python')
+        self.assertEqual(b''.join(response.streaming_content), b'project archive')
+        storage.open.assert_called_once_with(self.name, 'rb')
+
+
+class ImageDerivativeTests(SimpleTestCase):
+    """Derivatives are resized, smaller than the upload and written once per image"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.storage = FileSystemStorage(location=directory.name)
+
+    def upload(self, width, height):
+        # A gradient with noise compresses roughly like a screenshot or photo
+        image = Image.radial_gradient('L').resize((width, height)).convert('RGB')
+        image = Image.blend(image, Image.effect_noise((width, height), 40).convert('RGB'), 0.3)
+        buffer = io.BytesIO()
+        image.save(buffer, 'JPEG', quality=95)
+        return self.storage.save('projects/images/upload.jpg', ContentFile(buffer.getvalue()))
+
+    def test_derivatives_are_smaller_than_the_original(self):
+        name = self.upload(2400, 1600)
+        manifest = generate_derivatives(name, self.storage)
+        original = self.storage.size(name)
+        for ext in ('webp', 'jpeg'):
+            self.assertEqual([width for width, _ in manifest[ext]], [320, 640, 1024])
+            for width, derivative in manifest[ext]:
+                self.assertIn(manifest['hash'], derivative)
+                with self.storage.open(derivative) as f, Image.open(f) as image:
+                    self.assertEqual(image.width, width)
+                self.assertLess(self.storage.size(derivative), original)
+        # The widest WebP, what desktop cards load, is a fraction of the upload
+        self.assertLess(self.storage.size(manifest['webp'][-1][1]), original / 4)
+
+    def test_small_image_keeps_its_width(self):
+        manifest = generate_derivatives(self.upload(800, 600), self.storage)
+        self.assertEqual([width for width, _ in manifest['webp']], [320, 640, 800])
+
+    def test_unchanged_image_is_not_regenerated(self):
+        name = self.upload(1200, 800)
+        manifest = generate_derivatives(name, self.storage)
+        with mock.patch.object(self.storage, 'save') as save:
+            self.assertEqual(generate_derivatives(name, self.storage), manifest)
+        save.assert_not_called()
+
+
+class ExportBatchTests(TestCase):
+    """Exports read through one server-side cursor, or page by primary key behind pgbouncer"""
+
+    fields = ['order_id', 'user__username']
+
+    @classmethod
+    def setUpTestData(cls):
+        buyer = User.objects.create_user('exportbuyer')
+        project = Project.objects.create(
+            title='Exported Project', short_description='Short', long_description='Long',
+            technology='Python', price=Decimal('499.00'),
+        )
+        cls.orders = [
+            Order.objects.create(user=buyer, project=project, amount=project.price, order_id=f'ORD-EXPORT{n}')
+            for n in range(5)
+        ]
+
+    def export(self):
+        queryset = Order.objects.filter(user__username='exportbuyer')
+        with CaptureQueriesContext(connection) as queries:
+            lines = b''.join(iter_export(queryset, self.fields, chunk_size=2)).decode().splitlines()
+        self.assertEqual(lines[0], 'order_id,user__username')
+        self.assertEqual(sorted(lines[1:]), [f'{order.order_id},exportbuyer' for order in self.orders])
+        return lines[1:], queries
+
+    def test_server_side_cursor(self):
+        _, queries = self.export()
+        self.assertEqual(len(queries), 1)
+
+    def test_pgbouncer_pages_by_primary_key(self):
+        with mock.patch.dict(connection.settings_dict, DISABLE_SERVER_SIDE_CURSORS=True):
+            rows, queries = self.export()
+        self.assertEqual(rows, [f'{order.order_id},exportbuyer' for order in self.orders])
+        # Three pages of two rows, then the empty page that ends the export
+        self.assertEqual(len(queries), 4)
+        self.assertTrue(all('LIMIT 2' in query['sql'] for query in queries))
+
+
+@override_settings(RAZORPAY_KEY_SECRET='test_secret', STORAGES=TEST_STORAGES)
+class VerifyPaymentTests(TestCase):
+    """The browser callback tells a new purchase, a duplicate payment and a forged one apart"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.buyer = User.objects.create_user('verifybuyer', password='password')
+        cls.project = Project.objects.create(
+            title='Verified Project', short_description='Short', long_description='Long',
+            technology='Python', price=Decimal('499.00'),
+        )
+        for n in range(2):
+            Order.objects.create(
+                user=cls.buyer, project=cls.project, amount=cls.project.price, razorpay_order_id=f'order_verify_{n}',
+            )
+
+    def verify(self, razorpay_order_id, payment_id, signature=None):
+        if signature is None:
+            signature = hmac.new(
+                b'test_secret', f'{razorpay_order_id}|{payment_id}'.encode(), hashlib.sha256,
+            ).hexdigest()
+        return self.client.post(reverse('core:verify_payment'), json.dumps({
+            'razorpay_order_id': razorpay_order_id, 'razorpay_payment_id': payment_id,
+            'razorpay_signature': signature,
+        }), content_type='application/json')
+
+    def test_second_paid_order_is_reported_as_duplicate(self):
+        self.client.force_login(self.buyer)
+        self.assertEqual(self.verify('order_verify_0', 'pay_verify_0').json()['status'], 'success')
+        with self.assertLogs('core.payments', 'WARNING'):
+            response = self.verify('order_verify_1', 'pay_verify_1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'duplicate')
+        self.assertEqual(Order.objects.get(razorpay_order_id='order_verify_1').status, 'duplicate')
+        # Shown on the dashboard the client redirects to
+        self.assertContains(self.client.get(reverse('core:dashboard')), 'will be refunded')
+
+    def test_forged_signature_is_rejected(self):
+        response = self.verify('order_verify_0', 'pay_verify_0', signature='0' * 64)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Order.objects.get(razorpay_order_id='order_verify_0').status, 'pending')
+
+
+class AnalyticsRollupTests(TestCase):
+    """Daily rollups count each sale once, and refunded duplicates not at all"""
+
+    def test_consecutive_days_are_one_range(self):
+        today = timezone.localdate()
+        days = [today - timedelta(days=n) for n in (0, 1, 2, 6, 7)]
+        sql = str(Download.objects.filter(_on_days('downloaded_at', days)).query)
+        self.assertEqual(sql.count('>='), 2)
+
+    def test_duplicate_payments_are_not_revenue(self):
+        buyer, other, third = (User.objects.create_user(f'rollupbuyer{n}') for n in range(3))
+        project = Project.objects.create(
+            title='Rolled Up Project', short_description='Short', long_description='Long',
+            technology='Python', price=Decimal('499.00'),
+        )
+        today = timezone.localdate()
+        # Sales today, yesterday and five days ago; the second order of today is a duplicate
+        sales = [(buyer, 0, 'completed'), (buyer, 0, 'duplicate'), (other, 1, 'completed'), (third, 5, 'completed')]
+        for n, (user, days_ago, status) in enumerate(sales):
+            order = Order.objects.create(user=user, project=project, amount=project.price, status=status)
+            PaymentTransaction.objects.create(
+                order=order, transaction_id=f'pay_rollup_{n}', amount=order.amount, status='success',
+            )
+            moment = timezone.now() - timedelta(days=days_ago)
+            Order.objects.filter(pk=order.pk).update(created_at=moment)
+            PaymentTransaction.objects.filter(order=order).update(created_at=moment)
+
+        rollup_analytics()
+        stats = {
+            row.date: (row.orders_created, row.orders_completed, row.revenue)
+            for row in DailyProjectStats.objects.filter(project=project)
+        }
+        self.assertEqual(stats, {
+            today: (2, 1, Decimal('499.00')),
+            today - timedelta(days=1): (1, 1, Decimal('499.00')),
+            today - timedelta(days=5): (1, 1, Decimal('499.00')),
+        })
+
+
+class ProjectImporterTests(TestCase):
+    """Only rows that are written leave copied files in storage"""
+
+    def setUp(self):
+        source = tempfile.TemporaryDirectory()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(source.cleanup)
+        self.addCleanup(media.cleanup)
+        self.source = source.name
+        self.media = media.name
+        self.enterContext(override_settings(STORAGES=TEST_STORAGES, MEDIA_ROOT=self.media))
+        Project.objects.create(
+            title='Existing', slug='existing', short_description='Short', long_description='Long',
+            technology='Python', price=Decimal('499.00'), project_file='projects/files/existing.zip',
+        )
+
+    def records(self, *slugs):
+        records = []
+        for slug in slugs:
+            with open(os.path.join(self.source, f'{slug}.zip'), 'wb') as f:
+                f.write(b'archive')
+            records.append({
+                'title': slug.title(), 'slug': slug, 'short_description': 'Short', 'long_description': 'Long',
+                'technology': 'Python', 'price': '499', 'project_file': f'{slug}.zip',
+            })
+        return records
+
+    def import_chunk(self, on_conflict, *slugs):
+        importer = ProjectImporter(self.source, on_conflict=on_conflict, allow_missing_files=True)
+        return importer.write_chunk([importer.build(record) for record in self.records(*slugs)])
+
+    def stored_files(self):
+        directory = os.path.join(self.media, 'projects', 'files')
+        return sorted(os.listdir(directory)) if os.path.isdir(directory) else []
+
+    def test_skipped_records_copy_no_files(self):
+        self.assertEqual(self.import_chunk('skip', 'existing', 'fresh'), 1)
+        self.assertEqual(self.stored_files(), ['fresh.zip'])
+        self.assertEqual(Project.objects.get(slug='existing').project_file.name, 'projects/files/existing.zip')
+
+    def test_failed_chunk_removes_its_copies(self):
+        with self.assertRaises(IntegrityError):
+            self.import_chunk('error', 'fresh', 'existing')
+        self.assertEqual(self.stored_files(), [])
+        self.assertFalse(Project.objects.filter(slug='fresh').exists())
+
+
+class DownloadLogTests(TestCase):
+    """Spilled download events reach the database once, whoever left them behind"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.buyer = User.objects.create_user('logdownloader')
+        cls.project = Project.objects.create(
+            title='Logged Download', short_description='Short', long_description='Long',
+            technology='Python', price=Decimal('499.00'),
+        )
+        cls.order = Order.objects.create(user=cls.buyer, project=cls.project, amount=cls.project.price, status='completed')
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        self.log = DownloadLog(self.directory, batch_size=2, interval=3600)
+        # The test flushes itself: no background flusher on another
+        # connection, and no flush into a deleted directory at exit
+        self.enterContext(mock.patch('core.audit.threading.Thread'))
+        self.enterContext(mock.patch('core.audit.atexit.register'))
+
+    def spill(self, name, events=1):
+        line = json.dumps({
+            'user_id': self.buyer.pk, 'project_id': self.project.pk, 'order_id': self.order.pk,
+            'ip_address': None, 'downloaded_at': timezone.now().isoformat(),
+        })
+        (self.directory / name).write_text(f'{line}\n' * events)
+
+    def test_recorded_events_are_written(self):
+        with mock.patch('core.audit.os.fsync', wraps=os.fsync) as fsync:
+            for _ in range(5):
+                self.log.record(self.buyer.pk, self.project.pk, self.order.pk, '127.0.0.1')
+            # At each batch boundary only
+            self.assertEqual(fsync.call_count, 2)
+            self.log.flush()
+        self.assertEqual(Download.objects.filter(order=self.order).count(), 5)
+        self.assertEqual([path.suffix for path in self.directory.iterdir()], ['.lock'])
+
+    def test_files_of_a_stopped_process_are_claimed(self):
+        (self.directory / 'web2-0d1e.lock').touch()
+        self.spill('web2-0d1e.active.jsonl')
+        self.spill('web2-0d1e.1.segment.jsonl', events=2)
+        self.log.flush()
+        self.assertEqual(Download.objects.filter(order=self.order).count(), 3)
+        self.assertFalse(list(self.directory.glob('web2-0d1e.*')))
+
+    def test_files_of_a_running_process_are_left_alone(self):
+        with open(self.directory / 'web2-77aa.lock', 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            self.spill('web2-77aa.active.jsonl')
+            self.log.flush()
+        self.assertFalse(Download.objects.filter(order=self.order).exists())
+        self.assertTrue((self.directory / 'web2-77aa.active.jsonl').exists())
+
+    def test_pid_named_files_are_claimed(self):
+        self.spill('4242.active.jsonl')
+        self.log.flush()
+        self.assertEqual(Download.objects.filter(order=self.order).count(), 1)
+
+
+@override_settings(STORAGES=TEST_STORAGES, PAGINATE_BY=2)
+class DashboardTests(TestCase):
+    """The purchase list pages over every owned project, even while the cached totals are stale"""
+
+    def test_pagination_follows_the_library(self):
+        buyer = User.objects.create_user('dashboardbuyer')
+        self.client.force_login(buyer)
+        # Cached before the purchases, e.g. by a request racing the payment
+        self.assertEqual(get_user_stats(buyer.pk)['purchases'], 0)
+        for n in range(3):
+            project = Project.objects.create(
+                title=f'Dashboard Project {n}', short_description='Short', long_description='Long',
+                technology='Python', price=Decimal('499.00'),
+            )
+            Order.objects.create(user=buyer, project=project, amount=project.price, status='completed')
+
+        response = self.client.get(reverse('core:dashboard'), {'page': 2})
+        self.assertEqual(response.context['page_obj'].paginator.count, 3)
+        self.assertEqual([order.project.title for order in response.context['page_obj']], ['Dashboard Project 0'])
+
+
+@override_settings(STORAGES=TEST_STORAGES, PAGINATE_BY=2)
+class CatalogueCursorTests(TestCase):
+    """Catalogue pages are cached by verified cursor position, never by the raw parameter"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.projects = [
+            Project.objects.create(
+                title=f'Cursor Project {n}', short_description='Short', long_description='Long',
+                technology='Python', price=Decimal('499.00'),
+            )
+            for n in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        # Signed-in pages skip the page cache, so every request reaches the query cache
+        self.client.force_login(User.objects.create_user('cursorbrowser'))
+
+    def list_page(self, cursor):
+        with mock.patch('core.views.cached_catalogue_query', wraps=cached_catalogue_query) as cached:
+            response = self.client.get(reverse('core:project_list'), {'cursor': cursor})
+        return response, cached.call_args.args
+
+    def test_forged_cursor_is_cached_as_first_page(self):
+        first, first_key = self.list_page('')
+        forged, forged_key = self.list_page('not-a-cursor')
+        self.assertEqual(forged_key, first_key)
+        self.assertIsNone(forged_key[2])
+        self.assertEqual(list(forged.context['page_obj']), list(first.context['page_obj']))
+
+    def test_valid_cursor_is_cached_by_position(self):
+        cursor = encode_cursor(self.projects[1], 'next')
+        response, key = self.list_page(cursor)
+        self.assertEqual(key[2], decode_cursor(cursor))
+        self.assertEqual(list(response.context['page_obj']), [self.projects[0]])
+
+
+class PartitionTests(TestCase):
+    """Monthly partitions of the event tables"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.buyer = User.objects.create_user('partitionbuyer')
+        cls.project = Project.objects.create(
+            title='Partitioned Project', short_description='Short', long_description='Long',
+            technology='Python', price=Decimal('499.00'),
+        )
+        cls.order = Order.objects.create(
+            user=cls.buyer, project=cls.project, amount=cls.project.price, status='completed',
+        )
+
+    def test_partition_takes_over_rows_from_default(self):
+        # Far past the partitions created ahead, so the row lands in core_download_default
+        month = add_months(timezone.now().date().replace(day=1), 30)
+        downloaded_at = timezone.make_aware(datetime(month.year, month.month, 15))
+        download = Download.objects.create(
+            user=self.buyer, project=self.project, order=self.order, downloaded_at=downloaded_at,
+        )
+        with connection.cursor() as cursor:
+            self.assertEqual(create_partition(cursor, 'core_download', month), 1)
+            cursor.execute(f'SELECT id FROM {partition_name("core_download", month)}')
+            self.assertEqual(cursor.fetchall(), [(download.pk,)])
+            cursor.execute('SELECT count(*) FROM core_download_default')
+            self.assertEqual(cursor.fetchone()[0], 0)
+        self.assertTrue(Download.objects.filter(pk=download.pk).exists())
+
+    def _relkind(self, cursor, table):
+        cursor.execute('SELECT relkind FROM pg_class WHERE oid = %s::regclass', [table])
+        return cursor.fetchone()[0]
+
+    def test_migration_rebuilds_populated_tables(self):
+        migration = importlib.import_module('core.migrations.0016_partition_event_tables')
+        this_month = timezone.now().date().replace(day=1)
+        old_month = add_months(this_month, -14)
+        old = Download.objects.create(
+            user=self.buyer, project=self.project, order=self.order,
+            downloaded_at=timezone.make_aware(datetime(old_month.year, old_month.month, 3)),
+        )
+        Download.objects.create(user=self.buyer, project=self.project, order=self.order)
+        PaymentTransaction.objects.create(
+            transaction_id='pay_partition', order=self.order, amount=self.order.amount, status='success',
+        )
+        with connection.cursor() as cursor:
+            # Deferred FK checks of the rows above would block ALTER TABLE
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+            with connection.schema_editor() as editor:
+                migration.unpartition_tables(apps, editor)
+            self.assertEqual(self._relkind(cursor, 'core_download'), 'r')
+            self.assertEqual(Download.objects.count(), 2)
+
+            with connection.schema_editor() as editor:
+                migration.partition_tables(apps, editor)
+            self.assertEqual(self._relkind(cursor, 'core_download'), 'p')
+            self.assertEqual(self._relkind(cursor, 'core_paymenttransaction'), 'p')
+            cursor.execute(f'SELECT id FROM {partition_name("core_download", old_month)}')
+            self.assertEqual(cursor.fetchall(), [(old.pk,)])
+        self.assertEqual(Download.objects.count(), 2)
+        self.assertEqual(PaymentTransaction.objects.get().transaction_id, 'pay_partition')
+        # The id sequence carries on past the copied rows
+        self.assertGreater(
+            Download.objects.create(user=self.buyer, project=self.project, order=self.order).pk, old.pk,
+        )
+
+    def test_migration_skips_other_databases(self):
+        migration = importlib.import_module('core.migrations.0016_partition_event_tables')
+        editor = SimpleNamespace(connection=SimpleNamespace(vendor='sqlite'))
+        migration.partition_tables(apps, editor)
+        migration.unpartition_tables(apps, editor)
+
+
+# Stands in for a streaming replica: a second connection to the test
+# database. Registered at import, before the test runner sets databases up,
+# unless DB_REPLICA_HOSTS already configured one.
+REPLICA = 'replica_1'
+if REPLICA not in settings.DATABASES:
+    settings.DATABASES[REPLICA] = {**settings.DATABASES[PRIMARY], 'TEST': {'MIRROR': PRIMARY}}
+    connections.configure_settings(settings.DATABASES)
+
+
+@override_settings(STORAGES=TEST_STORAGES)
+class ReplicaRoutingTests(TransactionTestCase):
+    """GET requests read from a replica unless the request or the browser wrote.
+
+    The replica is a TEST MIRROR of default, so this is a TransactionTestCase:
+    rows must be committed to be visible through the second connection.
+    """
+
+    databases = {PRIMARY, REPLICA}
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.project = Project.objects.create(
+            title='Routed Project', short_description='Short', long_description='Long',
+            technology='Python', price=Decimal('499.00'),
+        )
+
+    def route(self, request, view):
+        """Run view behind ReplicaRoutingMiddleware, returning the response and the alias of a Project read"""
+        used = []
+
+        def get_response(request):
+            view()
+            used.append(Project.objects.filter(pk=self.project.pk).db)
+            return HttpResponse()
+
+        response = ReplicaRoutingMiddleware(get_response)(request)
+        return response, used[0]
+
+    # Otherwise the catalogue cache fills from the primary right after setUp's write
+    @override_settings(REPLICA_PIN_SECONDS=0)
+    def test_get_reads_from_replica(self):
+        with CaptureQueriesContext(connections[REPLICA]) as replica, \
+                CaptureQueriesContext(connections[PRIMARY]) as primary:
+            response = self.client.get(reverse('core:project_list'))
+        self.assertContains(response, 'Routed Project')
+        self.assertTrue(any('core_project' in query['sql'] for query in replica.captured_queries))
+        self.assertFalse(any('core_project' in query['sql'] for query in primary.captured_queries))
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_write_pins_request_and_browser(self):
+        def write():
+            Project.objects.filter(pk=self.project.pk).update(featured=True)
+
+        response, alias = self.route(self.factory.get('/'), write)
+        self.assertEqual(alias, PRIMARY)
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+        request = self.factory.get('/')
+        request.COOKIES[PIN_COOKIE] = response.cookies[PIN_COOKIE].value
+        self.assertEqual(self.route(request, lambda: None)[1], PRIMARY)
+        self.assertEqual(self.route(self.factory.get('/'), lambda: None)[1], REPLICA)
+
+    def test_reads_in_atomic_block_stay_on_primary(self):
+        used = []
+
+        def read_in_transaction():
+            with transaction.atomic():
+                used.append(Project.objects.filter(pk=self.project.pk).db)
+
+        self.route(self.factory.get('/'), read_in_transaction)
+        self.assertEqual(used, [PRIMARY])
+
+    def test_post_reads_from_primary(self):
+        response, alias = self.route(self.factory.post('/'), lambda: None)
+        self.assertEqual(alias, PRIMARY)
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_login_does_not_pin(self):
+        User.objects.create_user('routedbuyer', password='password')
+        response = self.client.post(reverse('core:login'), {'username': 'routedbuyer', 'password': 'password'})
+        self.assertEqual(response.status_code, 302)
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+        # The new session is read from the primary, so the next GET is signed in
+        response = self.client.get(reverse('core:dashboard'))
+        self.assertEqual(response.status_code, 200)
@@ -27,13 +27,19 @@ urlpatterns = [
     # Verify payment after Razorpay success (AJAX endpoint)
     path('verify-payment/', views.verify_payment, name='verify_payment'),
     
+    # Razorpay server-to-server webhook (signed, processed asynchronously)
+    path('payment-webhook/', views.payment_webhook, name='payment_webhook'),
+    
     # Payment result pages
     path('payment-success/', views.payment_success, name='payment_success'),
     path('payment-failed/', views.payment_failed, name='payment_failed'),
     
     # ========== DOWNLOADS ==========
     # Download purchased project file
-    path('download/<str:order_id>/', views.download_project, name='download_project'),
+    path('download/<int:project_id>/', views.download_project, name='download_project'),
+    
+    # Signed, expiring download link (no session or database lookup)
+    path('d/<str:token>/', views.signed_download, name='signed_download'),
     
     # ========== USER DASHBOARD ==========
     # User dashboard showing purchased projects
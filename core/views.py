@@ -7,90 +7,117 @@ from django.contrib.auth.models import User
 from django.contrib import messages
 from django.views.generic import ListView, DetailView, CreateView
 from django.views.decorators.csrf import csrf_exempt
-from django.http import JsonResponse, FileResponse, HttpResponse
-from django.core.mail import send_mail
+from django.http import JsonResponse, Http404
 from django.conf import settings
+from django.db import transaction
 from django.core.paginator import Paginator
-from django.db.models import Q
-import razorpay
 import hmac
 import hashlib
 import json
 
-from .models import Project, Order, CustomProjectRequest, PaymentTransaction, Download, UserProfile
+from .models import Project, Order, CustomProjectRequest, UserProfile
 from .forms import CustomProjectRequestForm, UserRegistrationForm, UserProfileForm
-
-# Initialize Razorpay client
-razorpay_client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
+from .cache import cache_anonymous_page, cached_catalogue_query
+from .audit import log_download
+from .dashboard import get_user_stats
+from .delivery import serve_file
+from .downloads import read_download_token, signed_download_url, signed_project_download_url
+from .emails import queue_custom_request_notification
+from .entitlements import get_user_library
+from .gateway import GatewayUnavailable, PaymentGatewayError, get_gateway
+from .pagination import KeysetPaginator, decode_cursor
+from .payments import complete_order
+from .routers import bookkeeping_writes
+from .recommendations import related_projects as get_related_projects
+from .search import search_projects
+from .webhooks import record_webhook_event, verify_webhook_signature
 
 # Home Page
+@cache_anonymous_page
 def home_view(request):
     """Home page with featured projects"""
-    featured_projects = Project.objects.filter(is_active=True, featured=True)[:6]
-    recent_projects = Project.objects.filter(is_active=True).order_by('-created_at')[:8]
+    featured_projects = cached_catalogue_query('featured', builder=lambda: list(
+        Project.objects.filter(is_active=True, featured=True)[:6]
+    ))
+    recent_projects = cached_catalogue_query('recent', builder=lambda: list(
+        Project.objects.filter(is_active=True).order_by('-created_at')[:8]
+    ))
     context = {
         'featured_projects': featured_projects,
         'recent_projects': recent_projects,
+        'library': get_user_library(request.user.id) if request.user.is_authenticated else None,
     }
     return render(request, 'home.html', context)
 
 # Project Listing
+@cache_anonymous_page
 def project_list_view(request):
     """List all projects with search and filter"""
     projects = Project.objects.filter(is_active=True)
     
-    # Search functionality
-    search_query = request.GET.get('search', '')
-    if search_query:
-        projects = projects.filter(
-            Q(title__icontains=search_query) | 
-            Q(short_description__icontains=search_query) |
-            Q(technology__icontains=search_query)
-        )
-    
     # Filter by technology
     technology = request.GET.get('technology', '')
     if technology:
         projects = projects.filter(technology=technology)
     
-    # Pagination
-    paginator = Paginator(projects, 12)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Search functionality (ranked by relevance)
+    search_query = request.GET.get('search', '').strip()
+    if search_query:
+        projects = search_projects(projects, search_query)
+    
+    # Pagination: relevance-ranked search results use page numbers, the
+    # catalogue itself uses cursors so deep pages cost the same as page 1
+    if search_query:
+        paginator = Paginator(projects, settings.PAGINATE_BY)
+        page_obj = paginator.get_page(request.GET.get('page'))
+    else:
+        paginator = KeysetPaginator(
+            projects, settings.PAGINATE_BY,
+            estimate_count=settings.PROJECT_LIST_ESTIMATED_COUNT,
+        )
+        # Keyed by the verified position, not the raw parameter: forged or
+        # mangled cursors all fall back to (and share) the first page
+        position = decode_cursor(request.GET.get('cursor', ''))
+        page_obj = cached_catalogue_query(
+            'project_list', technology, position, settings.PROJECT_LIST_ESTIMATED_COUNT,
+            builder=lambda: paginator.get_page_at(position),
+        )
     
     technologies = Project.TECHNOLOGY_CHOICES
     
     context = {
         'page_obj': page_obj,
+        'is_keyset': not search_query,
         'technologies': technologies,
         'search_query': search_query,
         'selected_technology': technology,
+        'library': get_user_library(request.user.id) if request.user.is_authenticated else None,
     }
     return render(request, 'projects/project_list.html', context)
 
 # Project Detail
+@cache_anonymous_page
 def project_detail_view(request, slug):
     """Detailed view of a single project"""
-    project = get_object_or_404(Project, slug=slug, is_active=True)
+    project = cached_catalogue_query('project', slug, builder=lambda: (
+        Project.objects.filter(slug=slug, is_active=True).first()
+    ))
+    if project is None:
+        raise Http404('No Project matches the given query.')
     
     # Check if user has already purchased
-    has_purchased = False
-    if request.user.is_authenticated:
-        has_purchased = Order.objects.filter(
-            user=request.user,
-            project=project,
-            status='completed'
-        ).exists()
+    library = get_user_library(request.user.id) if request.user.is_authenticated else None
+    has_purchased = library is not None and project.id in library
     
-    related_projects = Project.objects.filter(
-        technology=project.technology,
-        is_active=True
-    ).exclude(id=project.id)[:4]
+    related_projects = cached_catalogue_query('related', project.id, builder=lambda: (
+        get_related_projects(project)
+    ))
     
     context = {
         'project': project,
         'has_purchased': has_purchased,
         'related_projects': related_projects,
+        'library': library,
         'razorpay_key': settings.RAZORPAY_KEY_ID,
     }
     return render(request, 'projects/project_detail.html', context)
@@ -103,23 +130,13 @@ def create_order(request, project_id):
         project = get_object_or_404(Project, id=project_id, is_active=True)
         
         # Check if already purchased
-        existing_order = Order.objects.filter(
-            user=request.user,
-            project=project,
-            status='completed'
-        ).first()
-        
-        if existing_order:
+        if project.id in get_user_library(request.user.id):
             return JsonResponse({'error': 'You have already purchased this project'}, status=400)
         
         try:
             # Create Razorpay order
             amount = int(float(project.price) * 100)  # Convert to paise
-            razorpay_order = razorpay_client.order.create({
-                'amount': amount,
-                'currency': 'INR',
-                'payment_capture': 1
-            })
+            razorpay_order = get_gateway().create_order(amount, 'INR')
             
             # Create order in database
             order = Order.objects.create(
@@ -138,6 +155,10 @@ def create_order(request, project_id):
                 'db_order_id': order.order_id
             })
             
+        except GatewayUnavailable:
+            return JsonResponse({'error': 'Payments are temporarily unavailable. Please try again shortly.'}, status=503)
+        except PaymentGatewayError as e:
+            return JsonResponse({'error': str(e)}, status=502)
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
     
@@ -162,29 +183,18 @@ def verify_payment(request):
                 hashlib.sha256
             ).hexdigest()
             
-            if generated_signature == razorpay_signature:
-                # Update order
-                order = Order.objects.get(razorpay_order_id=razorpay_order_id)
-                order.razorpay_payment_id = razorpay_payment_id
-                order.razorpay_signature = razorpay_signature
-                order.status = 'completed'
-                order.save()
-                
-                # Create transaction log
-                PaymentTransaction.objects.create(
-                    transaction_id=razorpay_payment_id,
-                    order=order,
-                    amount=order.amount,
-                    status='success',
-                    razorpay_response=data
-                )
-                
-                # Update project downloads count
-                order.project.downloads += 1
-                order.project.save()
+            if hmac.compare_digest(generated_signature, razorpay_signature or ''):
+                order, _ = complete_order(razorpay_order_id, razorpay_payment_id, razorpay_signature, data)
                 
-                # Send confirmation email
-                send_purchase_confirmation_email(order)
+                if order.status == 'duplicate':
+                    # Paid, but the user already owns the project (e.g. two tabs)
+                    message = 'You already own this project. This payment will be refunded.'
+                    messages.info(request, message)
+                    return JsonResponse({
+                        'status': 'duplicate',
+                        'message': message,
+                        'order_id': order.order_id
+                    })
                 
                 return JsonResponse({
                     'status': 'success',
@@ -201,6 +211,26 @@ def verify_payment(request):
     
     return JsonResponse({'error': 'Invalid request'}, status=400)
 
+# Payment Webhook
+@csrf_exempt
+def payment_webhook(request):
+    """Receive Razorpay webhooks: verify, store and acknowledge immediately"""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Invalid request'}, status=400)
+    
+    if not verify_webhook_signature(request.body, request.headers.get('X-Razorpay-Signature', '')):
+        return JsonResponse({'status': 'failed', 'message': 'Signature verification failed'}, status=400)
+    
+    try:
+        payload = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'status': 'failed', 'message': 'Invalid payload'}, status=400)
+    
+    # Razorpay sends a unique id per event; fall back to the body hash
+    event_id = request.headers.get('X-Razorpay-Event-Id') or hashlib.sha256(request.body).hexdigest()
+    record_webhook_event(event_id, payload)
+    return JsonResponse({'status': 'ok'})
+
 # Payment Success
 @login_required
 def payment_success(request):
@@ -218,30 +248,49 @@ def payment_failed(request):
 
 # Download Project
 @login_required
-def download_project(request, order_id):
-    """Download purchased project"""
-    order = get_object_or_404(Order, order_id=order_id, user=request.user, status='completed')
+def download_project(request, project_id):
+    """Check ownership, then hand out a short-lived signed download link"""
+    order_pk = get_user_library(request.user.id).order_for(project_id)
+    if order_pk is None:
+        raise Http404('You have not purchased this project.')
+    # Owners keep access to projects that have since been deactivated
+    project = get_object_or_404(Project.objects.only('project_file'), id=project_id)
+    return redirect(signed_project_download_url(order_pk, request.user.id, project))
+
+# Signed Download
+def signed_download(request, token):
+    """Serve a project file from a signed, expiring token without touching the database"""
+    claims = read_download_token(token)
+    if claims is None:
+        raise Http404('Download link is invalid or has expired.')
     
-    # Create download record
-    Download.objects.create(
-        user=request.user,
-        project=order.project,
-        order=order,
-        ip_address=request.META.get('REMOTE_ADDR')
-    )
+    # Audit record is written later in a batch
+    log_download(claims['u'], claims['p'], claims['o'], request.META.get('REMOTE_ADDR'))
     
-    # Serve file
-    file_path = order.project.project_file.path
-    response = FileResponse(open(file_path, 'rb'), as_attachment=True)
-    return response
+    # Serve file (or hand it off to the front-end server)
+    return serve_file(claims['f'])
 
 # User Dashboard
 @login_required
 def dashboard_view(request):
     """User dashboard showing purchased projects"""
-    orders = Order.objects.filter(user=request.user, status='completed').select_related('project')
+    stats = get_user_stats(request.user.id)
+    orders = Order.objects.filter(user=request.user, status='completed').select_related('project').only(
+        'order_id', 'amount', 'created_at', 'user', 'project',
+        'project__title', 'project__slug', 'project__technology', 'project__short_description',
+        'project__image', 'project__image_derivatives', 'project__project_file',
+    )
+    paginator = Paginator(orders, settings.PAGINATE_BY)
+    # One entitlement per completed order, so the cached library's size is
+    # the paginator's count without a COUNT(*); unlike the dashboard stats,
+    # it is invalidated by the same commit that grants or revokes an order
+    paginator.count = len(get_user_library(request.user.id))
+    page_obj = paginator.get_page(request.GET.get('page'))
+    for order in page_obj:
+        order.download_url = signed_download_url(order)
     context = {
-        'orders': orders,
+        'stats': stats,
+        'page_obj': page_obj,
     }
     return render(request, 'dashboard/dashboard.html', context)
 
@@ -254,10 +303,11 @@ def custom_project_request_view(request):
             custom_request = form.save(commit=False)
             if request.user.is_authenticated:
                 custom_request.user = request.user
-            custom_request.save()
-            
-            # Send notification email to admin
-            send_custom_request_notification(custom_request)
+            with transaction.atomic():
+                custom_request.save()
+                
+                # Queue notification email to admin
+                queue_custom_request_notification(custom_request)
             
             messages.success(request, 'Your request has been submitted successfully! We will contact you soon.')
             return redirect('core:home')
@@ -304,7 +354,9 @@ def login_view(request):
         user = authenticate(request, username=username, password=password)
         
         if user is not None:
-            login(request, user)
+            # Only last_login changes; the user's data is already on the replicas
+            with bookkeeping_writes():
+                login(request, user)
             next_url = request.GET.get('next', 'core:dashboard')
             return redirect(next_url)
         else:
@@ -319,57 +371,6 @@ def logout_view(request):
     messages.success(request, 'You have been logged out successfully.')
     return redirect('core:home')
 
-# Helper Functions
-def send_purchase_confirmation_email(order):
-    """Send purchase confirmation email"""
-    subject = f'Purchase Confirmation - {order.project.title}'
-    message = f"""
-    Dear {order.user.get_full_name() or order.user.username},
-    
-     Thank you for your purchase from ProjectLibrary!
-    
-    Order Details:
-    - Order ID: {order.order_id}
-    - Project: {order.project.title}
-    - Amount: ₹{order.amount}
-    
-    You can download your project from your dashboard.
-    
-     Thank you for choosing ProjectLibrary!
-    
-    Best regards,
-    ProjectLibrary Team 
-    """
-    
-    try:
-        send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [order.user.email])
-    except Exception as e:
-        print(f"Email error: {e}")
-
-def send_custom_request_notification(custom_request):
-    """Send custom request notification to admin"""
-    subject = f'New Custom Project Request - {custom_request.project_type}'
-    message = f"""
-    New custom project request received:
-    
-    Name: {custom_request.name}
-    Email: {custom_request.email}
-    Phone: {custom_request.phone}
-    Project Type: {custom_request.project_type}
-    Deadline: {custom_request.deadline}
-    Budget: ₹{custom_request.budget}
-    
-    Description:
-    {custom_request.description}
-    
-    ProjectLibrary System
-    """
-    
-    try:
-        send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [settings.DEFAULT_FROM_EMAIL])
-    except Exception as e:
-        print(f"Email error: {e}")
-
 # Static Pages
 def terms_view(request):
     """Terms and conditions page"""
@@ -0,0 +1,97 @@
+# core/webhooks.py
+import hashlib
+import hmac
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Order, PaymentWebhookEvent
+from .payments import complete_order, fail_order
+
+logger = logging.getLogger(__name__)
+
+CAPTURE_EVENTS = {'payment.captured', 'order.paid'}
+FAILURE_EVENTS = {'payment.failed'}
+
+
+def verify_webhook_signature(body, signature):
+    """Check the X-Razorpay-Signature HMAC of the raw request body"""
+    secret = settings.RAZORPAY_WEBHOOK_SECRET
+    if not secret or not signature:
+        return False
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def _payment_entity(payload):
+    return payload.get('payload', {}).get('payment', {}).get('entity', {})
+
+
+def record_webhook_event(event_id, payload):
+    """Persist a verified webhook; redelivered event ids are ignored"""
+    payment = _payment_entity(payload)
+    PaymentWebhookEvent.objects.bulk_create([PaymentWebhookEvent(
+        event_id=event_id,
+        event_type=payload.get('event', ''),
+        payment_id=payment.get('id') or '',
+        razorpay_order_id=payment.get('order_id') or '',
+        payload=payload,
+    )], ignore_conflicts=True)
+
+
+def _apply_event(event):
+    """Apply one event to its Order; returns the resulting event status"""
+    if not event.razorpay_order_id or not event.payment_id:
+        return 'ignored'
+
+    payment = _payment_entity(event.payload)
+    if event.event_type in CAPTURE_EVENTS:
+        complete_order(event.razorpay_order_id, event.payment_id, response=payment,
+                       payment_method=payment.get('method') or '')
+        return 'processed'
+    if event.event_type in FAILURE_EVENTS:
+        fail_order(event.razorpay_order_id, event.payment_id, response=payment,
+                   payment_method=payment.get('method') or '')
+        return 'processed'
+    return 'ignored'
+
+
+def process_webhook_events(batch_size=None):
+    """Apply one batch of pending webhook events; returns the number handled.
+
+    Events are claimed with SKIP LOCKED so several processors can run at
+    once. Within a batch only the first event per (payment, event type) is
+    applied, and complete_order/fail_order are idempotent across batches.
+    """
+    batch_size = batch_size or settings.WEBHOOK_BATCH_SIZE
+
+    with transaction.atomic():
+        events = list(
+            PaymentWebhookEvent.objects.select_for_update(skip_locked=True)
+            .filter(status='pending')
+            .order_by('received_at')[:batch_size]
+        )
+
+        seen = set()
+        for event in events:
+            key = (event.payment_id, event.event_type)
+            if event.payment_id and key in seen:
+                event.status = 'duplicate'
+            else:
+                seen.add(key)
+                try:
+                    # Savepoint per event so one bad event doesn't roll back the batch
+                    with transaction.atomic():
+                        event.status = _apply_event(event)
+                except Order.DoesNotExist:
+                    event.status, event.error = 'ignored', 'Unknown order'
+                except Exception as e:
+                    logger.exception('Webhook event %s failed', event.event_id)
+                    event.status, event.error = 'failed', str(e)
+            event.processed_at = timezone.now()
+
+        PaymentWebhookEvent.objects.bulk_update(events, ['status', 'error', 'processed_at'])
+
+    return len(events)
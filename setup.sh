@@ -82,6 +82,7 @@ echo "3. Access the application:"
 echo "   - Website: http://127.0.0.1:8000/"
 echo "   - Admin: http://127.0.0.1:8000/admin/"
 echo ""
-echo "4. Add sample projects through admin panel"
+echo "4. Add sample projects through admin panel, or import a catalogue:"
+echo "   python manage.py import_projects projects_sample.json --allow-missing-files"
 echo ""
 echo "Happy coding! 🎉"
\ No newline at end of file